@@ -1,13 +1,68 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+import asyncio
+import contextlib
+import hashlib
 import json
+import os
+import re
+import metrics
+from async_loop import run_with_progress
+from cache import get_cache
+from rate_control import get_controller
+
+MODEL = "gpt-4o"
+
+# Batch matching tuning
+CHUNK_TOKEN_BUDGET = int(os.environ.get("LUSHA_MATCH_CHUNK_TOKENS", "3000"))  # company text per request
+MAX_CHUNK_SIZE = 40  # keep the JSON answer well under the output limit
+MAX_IN_FLIGHT = int(os.environ.get("LUSHA_MATCH_CONCURRENCY", "5"))  # starting concurrency, adapted from there
+MAX_IN_FLIGHT_LIMIT = int(os.environ.get("LUSHA_MATCH_MAX_CONCURRENCY", str(MAX_IN_FLIGHT * 2)))
+MISSING_ID_RETRIES = 2
+
+# Chunk requests share one adaptive limit: 429s and Retry-After slow every
+# match down, and the SDK's own retries are off so they aren't doubled
+OPENAI_TARGET = "openai"
+get_controller().configure(OPENAI_TARGET, concurrency=MAX_IN_FLIGHT, max_concurrency=MAX_IN_FLIGHT_LIMIT, rate=0)
+
+def _error_result(message):
+    # Flagged with "error" so callers can tell failures from genuine low scores
+    return {"match_score": 0, "reasoning": f"Error: {message}", "error": message}
+
+def _normalize_profile(user_profile_text):
+    return re.sub(r"\s+", " ", user_profile_text or "").strip().lower()
+
+def _match_key(user_profile_text, company):
+    """
+    Cache key for a (profile, company, model) triple. company is either a dict
+    (identified by URL plus the fields sent to the model) or a prompt string.
+    """
+    if isinstance(company, dict):
+        identity = [company.get('url'), company.get('name'), company.get('website_url'), company.get('description')]
+    else:
+        identity = str(company)
+    payload = json.dumps([MODEL, _normalize_profile(user_profile_text), identity], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _record_usage(response):
+    # Token counters per LLM call; usage may be missing on compatible endpoints
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        metrics.incr("llm_tokens", getattr(usage, "prompt_tokens", 0) or 0, kind="prompt")
+        metrics.incr("llm_tokens", getattr(usage, "completion_tokens", 0) or 0, kind="completion")
 
 def match_company_with_profile(company_info, user_profile_text, api_key):
     """
     Uses OpenAI GPT to match a company with a user profile.
+    Results are memoized per (profile, company, model).
     """
     if not api_key:
         return {"match_score": 0, "reasoning": "API Key missing"}
 
+    key = _match_key(user_profile_text, company_info)
+    cached, state = get_cache().get("matches", key)
+    if state is not None:
+        return cached
+
     client = OpenAI(api_key=api_key)
 
     prompt = f"""
@@ -28,33 +83,30 @@ def match_company_with_profile(company_info, user_profile_text, api_key):
     """
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that outputs JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"}
-        )
-        
+        with metrics.span("llm_call", mode="single"):
+            response = client.chat.completions.create(
+                model=MODEL,
+                messages=[
+                    {"role": "system", "content": "You are a helpful assistant that outputs JSON."},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format={"type": "json_object"}
+            )
+        _record_usage(response)
+
         content = response.choices[0].message.content
-        return json.loads(content)
+        result = json.loads(content)
+        get_cache().set("matches", key, result)
+        return result
     except Exception as e:
-        return {"match_score": 0, "reasoning": f"Error: {str(e)}"}
-
-def batch_match_companies(companies_list, user_profile_text, api_key):
-    """
-    Matches a batch of companies with a user profile in a single API call to save costs.
-    """
-    if not api_key:
-        return {}
+        metrics.incr("llm_error")
+        return _error_result(str(e))
 
-    client = OpenAI(api_key=api_key)
-    
-    # Prepare batch input
-    companies_text = "\n".join([f"ID {i}: {c['name']} - {c.get('website_url', 'N/A')} - {c.get('description', '')}" for i, c in enumerate(companies_list)])
+def _company_line(company_id, company):
+    return f"ID {company_id}: {company['name']} - {company.get('website_url', 'N/A')} - {company.get('description', '')}"
 
-    prompt = f"""
+def _batch_prompt(companies_text, user_profile_text):
+    return f"""
     You are a career matching assistant. 
     Compare the following User Profile with the list of Companies.
     
@@ -76,19 +128,190 @@ def batch_match_companies(companies_list, user_profile_text, api_key):
     
     Return ONLY JSON.
     """
+
+def _batch_messages(companies_text, user_profile_text):
+    return [
+        {"role": "system", "content": "You are a helpful assistant that outputs JSON."},
+        {"role": "user", "content": _batch_prompt(companies_text, user_profile_text)}
+    ]
+
+def batch_match_companies(companies_list, user_profile_text, api_key):
+    """
+    Matches a batch of companies with a user profile in a single API call to save costs.
+    """
+    if not api_key:
+        return {}
+
+    # Only companies without a cached result are sent, under their original IDs
+    cache = get_cache()
+    results = {}
+    keys = {}
+    for i, company in enumerate(companies_list):
+        keys[i] = _match_key(user_profile_text, company)
+        cached, state = cache.get("matches", keys[i])
+        if state is not None:
+            results[str(i)] = cached
+    uncached = [i for i in range(len(companies_list)) if str(i) not in results]
+    if not uncached:
+        return results
+
+    client = OpenAI(api_key=api_key)
+    
+    # Prepare batch input
+    companies_text = "\n".join([_company_line(i, companies_list[i]) for i in uncached])
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that outputs JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"}
-        )
-        
-        content = response.choices[0].message.content
-        return json.loads(content)
+        with metrics.span("llm_call", mode="batch"):
+            response = client.chat.completions.create(
+                model=MODEL,
+                messages=_batch_messages(companies_text, user_profile_text),
+                response_format={"type": "json_object"}
+            )
+        _record_usage(response)
+
+        content = json.loads(response.choices[0].message.content)
+        for i in uncached:
+            if str(i) in content:
+                results[str(i)] = content[str(i)]
+                cache.set("matches", keys[i], content[str(i)])
+        return results
     except Exception as e:
         print(f"Batch AI Error: {e}")
-        return {}
+        metrics.incr("llm_error")
+        return results
+
+def _estimate_tokens(text):
+    # Rough heuristic (~4 characters per token); good enough for budgeting chunks
+    return len(text) // 4 + 1
+
+def chunk_companies(companies, token_budget=CHUNK_TOKEN_BUDGET, max_chunk_size=MAX_CHUNK_SIZE, indices=None):
+    """
+    Splits companies (or just the given indices) into lists of indices whose
+    prompt lines fit the token budget.
+    """
+    chunks, current, used = [], [], 0
+    for i in (range(len(companies)) if indices is None else indices):
+        cost = _estimate_tokens(_company_line(i, companies[i]))
+        if current and (used + cost > token_budget or len(current) >= max_chunk_size):
+            chunks.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _normalize_result(result):
+    if not isinstance(result, dict):
+        return None
+    try:
+        score = int(round(float(result.get("match_score", 0))))
+    except (TypeError, ValueError):
+        return None
+    return {"match_score": max(0, min(100, score)), "reasoning": str(result.get("reasoning", ""))}
+
+async def _match_chunk(client, semaphore, companies, indices, user_profile_text):
+    # Returns {index: result} for the IDs the model answered; the caller retries the rest.
+    # API errors are retried by the rate controller and raised once it gives up.
+    companies_text = "\n".join(_company_line(i, companies[i]) for i in indices)
+
+    async def request():
+        with metrics.span("llm_call", mode="chunk"):
+            return await client.chat.completions.create(
+                model=MODEL,
+                messages=_batch_messages(companies_text, user_profile_text),
+                response_format={"type": "json_object"}
+            )
+
+    async with semaphore:
+        response = await get_controller().call(OPENAI_TARGET, request)
+    _record_usage(response)
+    content = json.loads(response.choices[0].message.content)
+    results = {}
+    for i in indices:
+        result = _normalize_result(content.get(str(i)))
+        if result is not None:
+            results[i] = result
+    return results
+
+async def _match_companies(companies, user_profile_text, api_key, max_in_flight=None, progress_callback=None):
+    # Serve memoized results first; only the rest go to the API
+    cache = get_cache()
+    keys = [_match_key(user_profile_text, company) for company in companies]
+    results = [None] * len(companies)
+    uncached = []
+    for i, key in enumerate(keys):
+        cached, state = cache.get("matches", key)
+        if state is None:
+            uncached.append(i)
+        else:
+            results[i] = cached
+    done = len(companies) - len(uncached)
+    print(f"Matching {len(companies)} companies: {done} cached, {len(uncached)} sent to {MODEL}")
+    if progress_callback and done:
+        progress_callback(done, len(companies))
+    if not uncached:
+        return results
+
+    client = AsyncOpenAI(api_key=api_key, max_retries=0)
+    # An explicit max_in_flight caps the adaptive limit
+    semaphore = asyncio.Semaphore(max_in_flight) if max_in_flight else contextlib.nullcontext()
+
+    async def run_chunk(indices):
+        nonlocal done
+        missing = list(indices)
+        error = "no result returned by the model"
+        for attempt in range(MISSING_ID_RETRIES + 1):
+            try:
+                answered = await _match_chunk(client, semaphore, companies, missing, user_profile_text)
+            except ValueError as e:
+                # Unparseable answer: ask again for the whole chunk
+                print(f"Batch AI Error: {e}")
+                metrics.incr("llm_error")
+                answered = {}
+            except Exception as e:
+                # The API call failed even after the rate controller's retries
+                print(f"Batch AI Error: {e}")
+                metrics.incr("llm_error")
+                error = str(e)
+                break
+            for i, result in answered.items():
+                results[i] = result
+                cache.set("matches", keys[i], result)
+            missing = [i for i in missing if i not in answered]
+            done += len(answered)
+            if progress_callback and answered:
+                progress_callback(done, len(companies))
+            if not missing:
+                return
+            if attempt < MISSING_ID_RETRIES:
+                print(f"Retrying {len(missing)} companies missing from the AI response...")
+                metrics.incr("llm_retry", len(missing))
+        for i in missing:
+            results[i] = _error_result(error)
+        done += len(missing)
+        if progress_callback:
+            progress_callback(done, len(companies))
+
+    try:
+        with metrics.span("match"):
+            await asyncio.gather(*(run_chunk(indices) for indices in chunk_companies(companies, indices=uncached)))
+    finally:
+        await client.close()
+    return results
+
+def match_companies(companies, user_profile_text, api_key, progress_callback=None, max_in_flight=None):
+    """
+    Scores every company against the profile using token-budgeted batches sent
+    concurrently; companies already scored for this profile and model come from
+    the match cache. Returns a list of {"match_score", "reasoning"} in the same
+    order as companies. progress_callback(done, total) runs on the caller's thread.
+    """
+    if not api_key:
+        return [{"match_score": 0, "reasoning": "API Key missing"} for _ in companies]
+    if not companies:
+        return []
+    return run_with_progress(
+        lambda report: _match_companies(companies, user_profile_text, api_key, max_in_flight=max_in_flight, progress_callback=report),
+        progress_callback,
+    )
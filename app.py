@@ -1,11 +1,20 @@
+import time
 import streamlit as st
 import pandas as pd
-from scraper import get_industries, get_countries, scrape_companies
-from ai_matcher import match_company_with_profile
-from utils import to_excel
+from scraper import get_industries, get_countries
+from jobs import start_search, start_crawl, get_runner, FAILED
+from crawl import CRAWL_WORKERS
+from export import export_bytes, available_formats, FORMATS
+from results_view import company_card_html, get_view, page_count, SORTS
+from metrics import get_metrics, reset_metrics
+from rate_control import get_controller
 
 st.set_page_config(page_title="Lusha Company Search", page_icon="🔍", layout="wide")
 
+LIVE_CARDS = 50  # cards shown while a search is still running
+RESULTS_PAGE_SIZE = 25  # cards per page of results
+SCORER_LABELS = {"ai": "AI (OpenAI)", "local": "Local (offline)"}
+
 # Custom CSS for Premium Look
 st.markdown("""
 <style>
@@ -53,11 +62,12 @@ st.markdown("Find your ideal B2B companies and check your compatibility score.")
 # Sidebar
 with st.sidebar:
     st.header("Search Filters")
+    force_refresh = st.checkbox("Force refresh (bypass cache)", value=False)
     
     # 1. Fetch Industries (Button to load)
     if st.button("🔄 Iterate Industries"):
         with st.spinner("Fetching Industries..."):
-            st.session_state.industries = get_industries()
+            st.session_state.industries = get_industries(force_refresh=force_refresh)
     
     industry_names = [i['name'] for i in st.session_state.industries]
     selected_industry = st.selectbox("Select Industry", options=[""] + industry_names)
@@ -70,7 +80,7 @@ with st.sidebar:
         if st.session_state.selected_industry_url != selected_industry_data['url']:
              st.session_state.selected_industry_url = selected_industry_data['url']
              with st.spinner(f"Fetching countries for {selected_industry}..."):
-                st.session_state.countries = get_countries(selected_industry_data['url'])
+                st.session_state.countries = get_countries(selected_industry_data['url'], force_refresh=force_refresh)
     
     country_names = [c['name'] for c in st.session_state.countries]
     selected_country = st.selectbox("Select Location", options=[""] + country_names)
@@ -87,54 +97,113 @@ with st.sidebar:
         api_key = st.secrets["secrets"]["OPENAI_API_KEY"]
     except:
         api_key = st.text_input("OpenAI API Key", type="password")
-        if not api_key:
-            st.warning("Please add your API Key to .streamlit/secrets.toml or enter it above.")
+
+    # Without an API key only the offline scorer is available
+    scorer = st.radio("Scoring", options=list(SCORER_LABELS), format_func=SCORER_LABELS.get,
+                      index=0 if api_key else 1, disabled=not api_key, horizontal=True,
+                      help="Local scoring ranks companies by keyword overlap (BM25) with the profile, offline and instantly.")
+    if scorer == "ai" and not api_key:
+        st.warning("Please add your API Key to .streamlit/secrets.toml or enter it above.")
             
     user_profile_text = st.text_area("Paste Profile/Resume Text", height=200, placeholder="Paste your resume or profile description here...")
+    use_prerank = st.checkbox("Pre-rank locally before AI scoring", value=False, disabled=scorer != "ai", help="Scores companies against the profile with TF-IDF on this machine and only sends the top candidates to the AI.")
+    prerank_k = st.number_input("Companies sent to AI (top K)", min_value=5, max_value=1000, value=50, step=5, disabled=not use_prerank or scorer != "ai")
     
     st.markdown("---")
-    max_results = st.slider("Max Companies to Fetch", min_value=10, max_value=200, value=50, step=10)
+    max_results = st.number_input("Max Companies to Fetch", min_value=10, max_value=20000, value=50, step=10,
+                                  help="Large scrapes are checkpointed and resume where they stopped if interrupted.")
     search_btn = st.button("Search Companies")
 
+    # Sweep several industries/countries at once on worker processes
+    with st.expander("Crawl industries × countries"):
+        crawl_industries = st.multiselect("Industries", options=industry_names)
+        crawl_countries = st.multiselect("Countries (empty = all)", options=country_names)
+        crawl_workers = st.number_input("Worker processes", min_value=1, max_value=64, value=CRAWL_WORKERS)
+        crawl_btn = st.button("Start crawl", disabled=not crawl_industries)
+
+    st.markdown("---")
+    show_performance = st.checkbox("Show performance panel", value=False)
+
+# Where searches spend their time, aggregated over this process since the last reset
+if show_performance:
+    with st.expander("⏱ Performance", expanded=True):
+        snapshot = get_metrics()
+        if st.button("Reset metrics"):
+            reset_metrics()
+            snapshot = get_metrics()
+        if snapshot["spans"]:
+            spans_df = pd.DataFrame.from_dict(snapshot["spans"], orient="index").sort_values("total_ms", ascending=False)
+            st.markdown("**Timings (ms)**")
+            st.dataframe(spans_df)
+        else:
+            st.caption("No timings recorded yet.")
+        if snapshot["counters"]:
+            counters_df = pd.DataFrame(sorted(snapshot["counters"].items()), columns=["counter", "value"])
+            st.markdown("**Counters**")
+            st.dataframe(counters_df, hide_index=True)
+        # Current adaptive limits per host and for the OpenAI API
+        rate_targets = get_controller().snapshot()
+        if rate_targets:
+            st.markdown("**Rate control**")
+            st.dataframe(pd.DataFrame.from_dict(rate_targets, orient="index"))
+
 # Main Content Logic
 if search_btn:
     if not selected_country_data:
         st.error("Please select both an Industry and a Location.")
     else:
-        with st.spinner(f"Scraping companies in {selected_industry}, {selected_country} (Max: {max_results})..."):
-            data = scrape_companies(selected_country_data['url'], max_results=max_results)
-            
-            if not data:
-                st.warning("No companies found or scraper was blocked. Try different keywords.")
-            else:
-                st.success(f"Found {len(data)} companies!")
-                
-                # Automatic AI Analysis
-                if api_key and user_profile_text:
-                    st.info("Profile loaded. Analyzing matches...")
-                    progress_bar = st.progress(0)
-                    status_text = st.empty()
-                    
-                    analyzed_results = []
-                    total = len(data)
-                    
-                    for i, company in enumerate(data):
-                         status_text.text(f"Analyzing {i+1}/{total}: {company['name']}...")
-                         match_data = match_company_with_profile(
-                             str(company), 
-                             user_profile_text, 
-                             api_key
-                         )
-                         company.update(match_data)
-                         analyzed_results.append(company)
-                         progress_bar.progress((i + 1) / total)
-                    
-                    st.session_state.last_results = analyzed_results
-                    progress_bar.empty()
-                    status_text.empty()
-                    st.success("Analysis Complete!")
-                else:
-                    st.session_state.last_results = data
+        analyze = bool(user_profile_text and (api_key or scorer == "local"))
+        # Runs in the background job runner; identical in-flight searches are shared
+        job = start_search(
+            selected_country_data['url'],
+            int(max_results),
+            user_profile_text=user_profile_text if analyze else None,
+            api_key=api_key if analyze else None,
+            prerank_k=int(prerank_k) if use_prerank else None,
+            force_refresh=force_refresh,
+            scorer=scorer,
+        )
+        st.session_state.active_job_id = job.id
+        st.session_state.active_job_label = f"{selected_industry}, {selected_country} (Max: {max_results})"
+
+if crawl_btn:
+    job = start_crawl(crawl_industries, crawl_countries, max_results=int(max_results),
+                      workers=int(crawl_workers), force_refresh=force_refresh)
+    st.session_state.active_job_id = job.id
+    st.session_state.active_job_label = f"crawl of {len(crawl_industries)} industries (Max per listing: {max_results})"
+
+# Poll the active background job; the script reruns itself until it finishes
+if st.session_state.get('active_job_id'):
+    job = get_runner().get(st.session_state.active_job_id)
+    if job is None:
+        st.session_state.active_job_id = None
+        st.warning("The search job expired. Please search again.")
+    elif not job.finished:
+        st.info(f"Searching {st.session_state.active_job_label}... {job.message}")
+        st.progress(min(job.done / job.total, 1.0) if job.total else 0.0)
+        # Only the latest cards while running; large scrapes would redraw thousands every second
+        partial = job.results[-LIVE_CARDS:]
+        if partial:
+            if len(job.results) > LIVE_CARDS:
+                st.caption(f"Showing the latest {LIVE_CARDS} of {len(job.results)} companies found so far.")
+            st.markdown("".join(company_card_html(c) for c in partial), unsafe_allow_html=True)
+        time.sleep(1)
+        st.rerun()
+    else:
+        st.session_state.active_job_id = None
+        if job.status == FAILED:
+            st.error(f"Search failed: {job.error}")
+        elif not job.results:
+            st.warning("No companies found or scraper was blocked. Try different keywords.")
+        else:
+            st.success(f"Found {len(job.results)} companies!")
+            failed_matches = sum(1 for c in job.results if c.get('error'))
+            if failed_matches:
+                st.warning(f"{failed_matches} companies could not be scored (API errors or rate limits); see their reasoning.")
+            elif any('match_score' in c for c in job.results):
+                st.success("Analysis Complete!")
+            st.session_state.last_results = list(job.results)
+            st.session_state.last_results_version = job.id
 
 # Display Results & Export (Outside Search Button)
 if 'last_results' in st.session_state and st.session_state.last_results:
@@ -142,48 +211,60 @@ if 'last_results' in st.session_state and st.session_state.last_results:
     
     st.markdown(f"### Results ({len(results)})")
     
-    if not api_key:
-         st.warning("Enter OpenAI API Key to enable AI analysis.")
-    elif not user_profile_text:
-         st.warning("Paste a profile to enable AI matching.")
-
-    # Display Loop
-    for company in results:
-        is_analyzed = 'match_score' in company
-        
-        if is_analyzed:
-            score = company.get('match_score', 0)
-            color = "green" if score > 70 else "orange" if score > 40 else "red"
-            score_text = f"{score}% Match"
-            reasoning_text = company.get('reasoning', 'No reasoning provided.')
-        else:
-            color = "gray"
-            score_text = "Analysis Pending"
-            reasoning_text = "Analysis pending (Check API Key/Profile)..."
-        
-        with st.container():
-            st.markdown(f"""
-            <div class="company-card">
-                <div style="display:flex; justify-content:space-between;">
-                    <h3>{company.get('name', 'Unknown Company')}</h3>
-                    <h3 style="color:{color};">{score_text}</h3>
-                </div>
-                <p><strong>Website:</strong> <a href="{company.get('website_url', company.get('url', '#'))}" target="_blank">Link</a> | 
-                   <strong>LinkedIn:</strong> <a href="{company.get('linkedin', '#')}" target="_blank">Profile</a> |
-                   <span style="font-size:0.8em; color:gray;">(Lusha: <a href="{company.get('url', '#')}" target="_blank">Source</a>)</span></p>
-                <p><em>{reasoning_text}</em></p>
-            </div>
-            """, unsafe_allow_html=True)
-
-    # Export Logic
-    df = pd.DataFrame(st.session_state.last_results)
-    excel_data = to_excel(df)
+    if not user_profile_text:
+         st.warning("Paste a profile to enable matching.")
+    elif not api_key:
+         st.caption("Scored locally by keyword overlap. Enter an OpenAI API Key to enable AI analysis.")
+
+    # Sort, filter and paginate on the server; cards are rendered once per result set
+    version = st.session_state.get('last_results_version')
+    view = get_view(results, version)
+    controls = st.columns([2, 2, 2, 1, 1])
+    sort = controls[0].selectbox("Sort by", options=list(SORTS), format_func=SORTS.get)
+    name_filter = controls[1].text_input("Name contains")
+    min_score = controls[2].slider("Min match score", min_value=0, max_value=100, value=0, step=5)
+    website_only = controls[3].checkbox("Has website")
+    table_mode = controls[4].toggle("Table")
+
+    indices = view.query(sort, min_score=min_score, name_contains=name_filter, website_only=website_only)
+    st.caption(f"{len(indices)} of {len(results)} companies match.")
+
+    if table_mode:
+        # Compact mode: one virtualized grid over all matching rows
+        if st.session_state.get('results_df_version') != version or 'results_df' not in st.session_state:
+            st.session_state.results_df = pd.DataFrame(results)
+            st.session_state.results_df_version = version
+        df = st.session_state.results_df
+        columns = [c for c in ("name", "match_score", "website_url", "reasoning", "url") if c in df.columns]
+        st.dataframe(
+            df.iloc[indices][columns],
+            hide_index=True,
+            column_config={
+                "match_score": st.column_config.ProgressColumn("Score", min_value=0, max_value=100, format="%d"),
+                "website_url": st.column_config.LinkColumn("Website"),
+                "url": st.column_config.LinkColumn("Lusha"),
+            },
+        )
+    else:
+        page_size = RESULTS_PAGE_SIZE
+        pages = page_count(len(indices), page_size)
+        # Back to the first page whenever the filters change
+        query_state = (version, sort, name_filter, min_score, website_only)
+        if st.session_state.get('results_query') != query_state:
+            st.session_state.results_query = query_state
+            st.session_state.results_page = 1
+        st.session_state.results_page = min(st.session_state.get('results_page', 1), pages)
+        if indices:
+            st.markdown(view.page_html(indices, st.session_state.results_page, page_size), unsafe_allow_html=True)
+        if pages > 1:
+            st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key="results_page")
+
+    # Export Logic: files are generated on click and cached per result set
     st.markdown("### 📥 Export Data")
+    export_format = st.radio("Format", options=available_formats(), format_func=lambda f: FORMATS[f][0], horizontal=True)
     st.download_button(
-        label="Download Results as Excel",
-        data=excel_data,
-        file_name=f"lusha_companies_{selected_industry}_{selected_country}.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        label=f"Download Results as {FORMATS[export_format][0]}",
+        data=lambda: export_bytes(results, export_format, version),
+        file_name=f"lusha_companies_{selected_industry}_{selected_country}.{export_format}",
+        mime=FORMATS[export_format][1],
     )
-    
-    st.dataframe(df)
@@ -0,0 +1,138 @@
+import asyncio
+import atexit
+import queue
+import sys
+import threading
+
+# A single long-running event loop shared by every synchronous entry point.
+# Streamlit re-executes app.py on each interaction, but imported modules (and
+# therefore this loop and anything bound to it, like the browser pool) survive.
+_loop = None
+_thread = None
+_lock = threading.Lock()
+_shutdown_hooks = []
+
+
+def get_loop():
+    """
+    Returns the shared event loop, starting its thread on first use.
+    """
+    global _loop, _thread
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            # Windows fix: subprocesses (Chromium) need the proactor loop
+            if sys.platform == 'win32':
+                asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(target=_loop.run_forever, name="lusha-event-loop", daemon=True)
+            _thread.start()
+    return _loop
+
+
+def in_loop_thread():
+    return _thread is not None and threading.current_thread() is _thread
+
+
+def submit(coroutine):
+    """
+    Schedules a coroutine on the shared loop and returns a concurrent Future.
+    """
+    return asyncio.run_coroutine_threadsafe(coroutine, get_loop())
+
+
+def run_async(coroutine, timeout=None):
+    """
+    Runs a coroutine on the shared loop and blocks until it finishes.
+    """
+    if in_loop_thread():
+        coroutine.close()
+        raise RuntimeError("run_async() called from the event loop thread; await the coroutine instead.")
+    return submit(coroutine).result(timeout)
+
+
+def run_with_progress(make_coroutine, progress_callback=None, poll_interval=0.1):
+    """
+    Like run_async, but make_coroutine(report) receives a thread-safe report
+    function. Every report(*args) is replayed as progress_callback(*args) on the
+    calling thread, so callers like Streamlit can update widgets safely.
+    """
+    if progress_callback is None:
+        return run_async(make_coroutine(None))
+    if in_loop_thread():
+        raise RuntimeError("run_with_progress() called from the event loop thread.")
+
+    events = queue.Queue()
+    future = submit(make_coroutine(lambda *args: events.put(args)))
+    while not future.done():
+        try:
+            progress_callback(*events.get(timeout=poll_interval))
+        except queue.Empty:
+            pass
+    while not events.empty():
+        progress_callback(*events.get_nowait())
+    return future.result()
+
+
+def iter_async(make_async_gen):
+    """
+    Iterates an async generator on the shared loop from synchronous code.
+    Items are handed over through a thread-safe queue as they are produced;
+    closing the returned generator early cancels the async one.
+    """
+    items = queue.Queue()
+    finished = object()
+
+    async def pump():
+        try:
+            async for item in make_async_gen():
+                items.put(item)
+        finally:
+            items.put(finished)
+
+    future = submit(pump())
+    try:
+        while True:
+            item = items.get()
+            if item is finished:
+                break
+            yield item
+        future.result()
+    finally:
+        if not future.done():
+            future.cancel()
+
+
+def register_shutdown(hook):
+    """
+    Registers an async callable to run on the loop before the process exits.
+    """
+    _shutdown_hooks.append(hook)
+
+
+def shutdown(timeout=30):
+    global _loop, _thread
+    with _lock:
+        loop, thread = _loop, _thread
+        _loop, _thread = None, None
+    if loop is None or loop.is_closed():
+        return
+
+    async def _run_hooks():
+        for hook in reversed(_shutdown_hooks):
+            try:
+                await hook()
+            except Exception as e:
+                print(f"Shutdown hook failed: {e}")
+
+    try:
+        asyncio.run_coroutine_threadsafe(_run_hooks(), loop).result(timeout)
+    except Exception as e:
+        print(f"Error during shutdown: {e}")
+    loop.call_soon_threadsafe(loop.stop)
+    if thread is not None:
+        thread.join(timeout)
+    if not loop.is_running():
+        loop.close()
+
+
+atexit.register(shutdown)
@@ -0,0 +1,210 @@
+import random
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+# Synthetic stand-in for the Lusha company directory. Pages use the same
+# markup the scraper reads (.directory-content-box-col, .directory-content-box,
+# .company-hero-info), and every response is delayed by a configurable latency.
+#
+#   /company-search/                           directory of industries
+#   /company-search/<industry>/                countries of an industry
+#   /company-search/<industry>/<country>/      paginated listing (?page=N)
+#   /company-search/company/<slug>/            company page
+
+
+def _page(title, body, filler_kb):
+    # Trackers and a stylesheet so the browser path has something to block
+    filler = "".join(
+        f"<p>Directory filler paragraph {i} with enough text to pad the page out.</p>"
+        for i in range(filler_kb * 1024 // 80)
+    )
+    return f"""<!DOCTYPE html>
+<html><head><title>{escape(title)} | Lusha</title>
+<link rel="stylesheet" href="/static/site.css">
+<script async src="https://www.googletagmanager.com/gtag/js?id=G-MOCK"></script>
+<script src="https://js.hs-scripts.com/0000.js"></script>
+</head><body>
+<header><a href="/">Lusha</a> <a href="/login/">Login</a> <a href="/signup/">Sign Up</a></header>
+<main>{body}</main>
+<footer><a href="/privacy/">Privacy Policy</a> <a href="/terms/">Terms of Use</a>
+<a href="https://twitter.com/lusha">Twitter</a> <a href="https://www.linkedin.com/company/lusha">LinkedIn</a></footer>
+<div style="display:none">{filler}</div>
+</body></html>"""
+
+
+class MockLushaSite:
+    """
+    Threaded HTTP server for the synthetic directory. Every listing has
+    `companies` companies split into pages of `page_size`; a `browser_only`
+    fraction of company pages render their hero links from script, so plain
+    HTTP finds nothing and the scraper has to fall back to the browser. The
+    first `overlap` fraction of every listing is the same set of companies,
+    as when a company is listed under several industries or countries. With
+    `max_rate`, requests beyond that many per second get a 429 with
+    Retry-After, like a rate-limited production site.
+    """
+    def __init__(self, latency_ms=50, jitter=0.2, industries=5, countries=5, companies=200,
+                 page_size=25, filler_kb=40, browser_only=0.0, overlap=0.0, seed=0, max_rate=None):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.industries = [f"industry-{i}" for i in range(industries)]
+        self.countries = [f"country-{i}" for i in range(countries)]
+        self.companies = companies
+        self.page_size = page_size
+        self.filler_kb = filler_kb
+        self.browser_only = browser_only
+        self.overlap = overlap
+        self.seed = seed
+        self.max_rate = max_rate
+        self._allowance = max_rate or 0
+        self._allowance_at = time.monotonic()
+        self.requests = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def admit(self):
+        # Token bucket holding one second's worth of requests
+        if not self.max_rate:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._allowance = min(self.max_rate, self._allowance + (now - self._allowance_at) * self.max_rate)
+            self._allowance_at = now
+            if self._allowance < 1:
+                return False
+            self._allowance -= 1
+            return True
+
+    def count(self, kind):
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    def delay(self):
+        if self.latency_ms:
+            spread = self.latency_ms * self.jitter
+            time.sleep(max(0.0, self.latency_ms + random.uniform(-spread, spread)) / 1000)
+
+    def _directory(self):
+        cols = "".join(
+            f'<div class="directory-content-box-col"><a href="/company-search/{slug}/">Industry {i}</a></div>'
+            for i, slug in enumerate(self.industries)
+        )
+        return _page("Company Search", f'<div class="directory-content-box">{cols}</div>', self.filler_kb)
+
+    def _industry(self, industry):
+        cols = "".join(
+            f'<div class="directory-content-box-col"><a href="/company-search/{industry}/{slug}/">Country {i}</a></div>'
+            for i, slug in enumerate(self.countries)
+        )
+        return _page(industry, f'<div class="directory-content-box">{cols}</div>', self.filler_kb)
+
+    def _listing(self, industry, country, page_num):
+        start = (page_num - 1) * self.page_size
+        stop = min(start + self.page_size, self.companies)
+        shared = int(self.companies * self.overlap)
+        links = "".join(
+            f'<div class="directory-content-box-col"><a href="/company-search/company/{slug}/">Company {slug}</a></div>'
+            for slug in (f"shared-{i}" if i < shared else f"{industry}-{country}-{i}" for i in range(start, stop))
+        )
+        pages = -(-self.companies // self.page_size)
+        nav = "".join(f'<a href="?page={n}">{n}</a> ' for n in range(1, min(pages, 5) + 1))
+        if page_num < pages:
+            nav += f'<a href="?page={page_num + 1}">Next</a>'
+        body = f'<div class="directory-content-box">{links}</div><nav class="pagination">{nav}</nav>'
+        return _page(f"{industry} {country}", body, self.filler_kb)
+
+    def _company(self, slug):
+        website = f"https://www.{slug}.example"
+        hero = (f'<a href="{website}">www.{slug}.example</a>'
+                f'<a href="https://www.linkedin.com/company/{slug}">LinkedIn</a>')
+        if random.Random(f"{self.seed}:{slug}").random() < self.browser_only:
+            # Hero links rendered client-side: only a real browser sees them
+            body = (f'<div class="company-hero-info" id="hero"></div>'
+                    f'<script>document.getElementById("hero").innerHTML = {hero!r};</script>')
+        else:
+            body = f'<div class="company-hero-info">{hero}</div>'
+        return _page(slug, f"<h1>{escape(slug)}</h1>{body}", self.filler_kb)
+
+    def render(self, path, query):
+        """
+        Returns (kind, status, html) for a request path.
+        """
+        parts = [p for p in path.split("/") if p]
+        if parts[:1] != ["company-search"]:
+            if path == "/static/site.css":
+                return "static", 200, "body { font-family: sans-serif; }"
+            return "other", 404, _page("Not found", "<p>Not found</p>", 0)
+        parts = parts[1:]
+        if not parts:
+            return "directory", 200, self._directory()
+        if len(parts) == 2 and parts[0] == "company":
+            return "company", 200, self._company(parts[1])
+        if len(parts) == 1 and parts[0] in self.industries:
+            return "industry", 200, self._industry(parts[0])
+        if len(parts) == 2 and parts[0] in self.industries and parts[1] in self.countries:
+            try:
+                page_num = max(1, int(query.get("page", ["1"])[0]))
+            except ValueError:
+                page_num = 1
+            return "listing", 200, self._listing(parts[0], parts[1], page_num)
+        return "other", 404, _page("Not found", "<p>Not found</p>", 0)
+
+    def start(self, host="127.0.0.1", port=0):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                kind, status, html = site.render(url.path, parse_qs(url.query))
+                throttled = kind != "static" and not site.admit()
+                if throttled:
+                    kind, status, html = "throttled", 429, _page("Too many requests", "<p>Slow down</p>", 0)
+                site.count(kind)
+                site.delay()
+                body = html.encode("utf-8")
+                self.send_response(status)
+                if throttled:
+                    self.send_header("Retry-After", "1")
+                content_type = "text/css" if kind == "static" else "text/html; charset=utf-8"
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client gave up (e.g. a scrape was stopped)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="mock-lusha", daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+if __name__ == "__main__":
+    # Serve the mock site on its own: python benchmarks/mock_lusha.py [port]
+    import sys
+    site = MockLushaSite()
+    print(f"Mock Lusha site on {site.start(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8765)}/company-search/")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        site.stop()
@@ -0,0 +1,150 @@
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Minimal OpenAI-compatible /v1/chat/completions endpoint for ai_matcher.py.
+# Scores are deterministic per company line, so repeated runs compare cleanly.
+
+_COMPANY_LINE = re.compile(r"^\s*ID (\d+): (.*)$", re.MULTILINE)
+
+
+def _score(text):
+    return zlib.crc32(text.encode("utf-8")) % 101
+
+
+class MockOpenAI:
+    """
+    Answers batch prompts with a {"<id>": {"match_score", "reasoning"}} object
+    and single-company prompts with one {"match_score", "reasoning"}. A `drop`
+    fraction of IDs is left out of batch answers to exercise the retry path,
+    and a `throttle` fraction of requests gets a 429 with Retry-After.
+    """
+    def __init__(self, latency_ms=400, per_company_ms=5, drop=0.0, throttle=0.0, seed=0):
+        self.latency_ms = latency_ms
+        self.per_company_ms = per_company_ms
+        self.drop = drop
+        self.throttle = throttle
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self.calls = 0
+        self.throttled = 0
+        self.companies_scored = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def complete(self, request):
+        """
+        Returns the chat completion body for a request body.
+        """
+        prompt = "\n".join(str(m.get("content", "")) for m in request.get("messages", []))
+        lines = _COMPANY_LINE.findall(prompt)
+        if lines:
+            answer = {}
+            for company_id, text in lines:
+                with self._lock:
+                    dropped = self._rng.random() < self.drop
+                if not dropped:
+                    score = _score(text)
+                    answer[company_id] = {"match_score": score, "reasoning": f"Synthetic score {score}."}
+        else:
+            score = _score(prompt)
+            answer = {"match_score": score, "reasoning": f"Synthetic score {score}."}
+        content = json.dumps(answer)
+
+        prompt_tokens = len(prompt) // 4 + 1
+        completion_tokens = len(content) // 4 + 1
+        with self._lock:
+            self.calls += 1
+            self.companies_scored += len(lines) or 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+        if self.latency_ms or self.per_company_ms:
+            time.sleep((self.latency_ms + self.per_company_ms * len(lines)) / 1000)
+        return {
+            "id": f"chatcmpl-mock-{self.calls}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def take_throttle(self):
+        with self._lock:
+            throttled = self._rng.random() < self.throttle
+            self.throttled += throttled
+        return throttled
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "throttled": self.throttled,
+                "companies_scored": self.companies_scored,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+            }
+
+    def start(self, host="127.0.0.1", port=0):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    request = None
+                headers = {}
+                if self.path.rstrip("/").endswith("/chat/completions") and isinstance(request, dict) and stub.take_throttle():
+                    status, body = 429, {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}
+                    headers["Retry-After"] = "1"
+                elif self.path.rstrip("/").endswith("/chat/completions") and isinstance(request, dict):
+                    status, body = 200, stub.complete(request)
+                else:
+                    status, body = 404, {"error": {"message": f"Unsupported request: {self.path}"}}
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client gave up (e.g. a scrape was stopped)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="mock-openai", daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
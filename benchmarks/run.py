@@ -0,0 +1,254 @@
+"""
+Offline benchmark for the scraper and the matcher.
+
+Starts the mock Lusha site and the stub OpenAI endpoint, points the app at
+them and runs get_industries/get_countries, scrape_companies (cold, then from
+the cache) and match_companies (cold, then from the match cache). Reports
+companies/sec, p50/p95 latency per stage (the metrics.py spans), peak browser memory and API call
+counts, and compares them with a saved baseline:
+
+    python benchmarks/run.py                        # run and compare with the baseline
+    python benchmarks/run.py --save-baseline        # run and overwrite the baseline
+    python benchmarks/run.py --companies 1000 --latency-ms 150 --browser-only 0.1
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from mock_lusha import MockLushaSite
+from mock_openai import MockOpenAI
+
+BASELINE_DIR = os.path.join(HERE, "baselines")
+PROFILE = "Senior Python data engineer, 6 years building ETL pipelines and analytics platforms."
+
+# Metrics compared with the baseline: suffix -> whether higher is better
+COMPARED = {"companies_per_sec": True, "p95_ms": False, "api_calls": False}
+
+
+def _stage_stats(snapshot):
+    return {
+        key: {"count": span["count"], "p50_ms": span["p50_ms"], "p95_ms": span["p95_ms"]}
+        for key, span in snapshot["spans"].items()
+    }
+
+
+def _child_rss_kb(root_pid):
+    # Total RSS of all descendants of root_pid (the browser processes); Linux only
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    total, stack = 0, list(children.get(root_pid, []))
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+    return total
+
+
+class MemorySampler:
+    """
+    Samples the RSS of child processes in the background and keeps the peak.
+    """
+    def __init__(self, interval=0.25):
+        self.interval = interval
+        self.peak_kb = 0
+        self.supported = os.path.isdir("/proc")
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.supported:
+            self._thread = threading.Thread(target=self._run, name="memory-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_kb = max(self.peak_kb, _child_rss_kb(os.getpid()))
+            self._stop.wait(self.interval)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return round(self.peak_kb / 1024, 1) if self.supported else None
+
+
+def _phase(name, fn, site, stub, companies=None):
+    import metrics
+    requests_before = dict(site.requests)
+    calls_before = stub.stats()["calls"]
+    metrics.reset_metrics()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    snapshot = metrics.get_metrics()
+    count = companies(result) if companies else None
+    report = {
+        "seconds": round(elapsed, 3),
+        "stages": _stage_stats(snapshot),
+        "counters": snapshot["counters"],
+        "site_requests": {k: v - requests_before.get(k, 0) for k, v in site.requests.items() if v - requests_before.get(k, 0)},
+        "api_calls": stub.stats()["calls"] - calls_before,
+    }
+    if count is not None:
+        report["companies"] = count
+        report["companies_per_sec"] = round(count / elapsed, 1) if elapsed else None
+    print(f"{name}: {elapsed:.2f}s" + (f", {count} companies ({report['companies_per_sec']}/s)" if count is not None else ""))
+    return result, report
+
+
+def run(args):
+    site = MockLushaSite(latency_ms=args.latency_ms, companies=args.companies, page_size=args.page_size,
+                         filler_kb=args.filler_kb, browser_only=args.browser_only, max_rate=args.site_max_rate)
+    stub = MockOpenAI(latency_ms=args.openai_latency_ms, drop=args.openai_drop, throttle=args.openai_throttle)
+    base_url = site.start()
+    openai_url = stub.start()
+    cache_dir = tempfile.mkdtemp(prefix="lusha-bench-")
+
+    # Module-level settings are read at import time, so configure before importing
+    os.environ["LUSHA_BASE_URL"] = base_url
+    os.environ["LUSHA_CACHE_PATH"] = os.path.join(cache_dir, "cache.sqlite3")
+    os.environ["OPENAI_BASE_URL"] = openai_url
+    if args.min_interval is not None:
+        os.environ["LUSHA_MIN_REQUEST_INTERVAL"] = str(args.min_interval)
+    import ai_matcher
+    import scraper
+
+    memory = MemorySampler().start()
+    phases = {}
+    try:
+        _, phases["directory"] = _phase(
+            "directory", lambda: (scraper.get_industries(force_refresh=True), scraper.get_countries(
+                f"{base_url}/company-search/{site.industries[0]}/", force_refresh=True)), site, stub)
+        listing_url = f"{base_url}/company-search/{site.industries[0]}/{site.countries[0]}/"
+        companies, phases["scrape_cold"] = _phase(
+            "scrape_cold", lambda: scraper.scrape_companies(listing_url, args.max_results, concurrency=args.concurrency),
+            site, stub, companies=len)
+        _, phases["scrape_warm"] = _phase(
+            "scrape_warm", lambda: scraper.scrape_companies(listing_url, args.max_results, concurrency=args.concurrency),
+            site, stub, companies=len)
+        _, phases["match_cold"] = _phase(
+            "match_cold", lambda: ai_matcher.match_companies(companies, PROFILE, "sk-benchmark"),
+            site, stub, companies=len)
+        _, phases["match_warm"] = _phase(
+            "match_warm", lambda: ai_matcher.match_companies(companies, PROFILE, "sk-benchmark"),
+            site, stub, companies=len)
+    finally:
+        browser_peak_mb = memory.stop()
+        site.stop()
+        stub.stop()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    return {
+        "config": {k: v for k, v in vars(args).items() if k not in ("save_baseline", "baseline", "tolerance")},
+        "phases": phases,
+        "browser_peak_rss_mb": browser_peak_mb,
+        "openai": stub.stats(),
+        "fetch_outcomes": scraper.get_fetch_stats(),
+        "browser_waits": scraper.get_wait_stats(),
+        "browser_traffic": scraper.get_traffic_stats(),
+    }
+
+
+def _flatten(report):
+    # "phase.metric" / "phase.stage.p95_ms" -> value, for the compared metrics only
+    flat = {}
+    for phase, data in report["phases"].items():
+        for key in ("companies_per_sec", "api_calls"):
+            if data.get(key) is not None:
+                flat[f"{phase}.{key}"] = data[key]
+        for stage, stats in data["stages"].items():
+            flat[f"{phase}.{stage}.p95_ms"] = stats["p95_ms"]
+    return flat
+
+
+def compare(report, baseline, tolerance):
+    """
+    Returns a list of regressions: metrics that got worse than the baseline by
+    more than `tolerance` (a fraction). Metrics missing from either side are skipped.
+    """
+    current, previous = _flatten(report), _flatten(baseline)
+    regressions = []
+    for key, old in previous.items():
+        new = current.get(key)
+        if new is None or not old:
+            continue
+        higher_is_better = next(v for suffix, v in COMPARED.items() if key.endswith(suffix))
+        change = (new - old) / old
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append(f"{key}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scraper and matcher against local mocks.")
+    parser.add_argument("--companies", type=int, default=200, help="companies per listing on the mock site")
+    parser.add_argument("--max-results", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=25)
+    parser.add_argument("--latency-ms", type=float, default=50, help="mock site latency per request")
+    parser.add_argument("--filler-kb", type=int, default=40, help="padding per mock page")
+    parser.add_argument("--browser-only", type=float, default=0.0, help="fraction of company pages that need the browser")
+    parser.add_argument("--concurrency", type=int, default=None, help="enrichment concurrency (default: scraper setting)")
+    parser.add_argument("--min-interval", type=float, default=None,
+                        help="seconds between requests to one host (default: scraper setting, which bounds cold scrapes)")
+    parser.add_argument("--openai-latency-ms", type=float, default=400)
+    parser.add_argument("--openai-drop", type=float, default=0.0, help="fraction of IDs the stub leaves out")
+    parser.add_argument("--openai-throttle", type=float, default=0.0, help="fraction of API calls answered with a 429")
+    parser.add_argument("--site-max-rate", type=float, default=None,
+                        help="requests/second the mock site serves before answering 429")
+    parser.add_argument("--baseline", default=os.path.join(BASELINE_DIR, "default.json"))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression before failing")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print(json.dumps(report, indent=2))
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("config") != report["config"]:
+        print("Baseline was recorded with a different configuration; comparing anyway.")
+    regressions = compare(report, baseline, args.tolerance)
+    if regressions:
+        print("Regressions against the baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
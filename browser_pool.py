@@ -0,0 +1,174 @@
+import asyncio
+import os
+import subprocess
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+import metrics
+from async_loop import register_shutdown
+from routing import install_routing, track_page, untrack_page
+
+# Number of warm browser contexts kept open (also the max number of pages in use at once)
+POOL_SIZE = int(os.environ.get("LUSHA_POOL_SIZE", "4"))
+# Contexts are thrown away and recreated after serving this many pages
+MAX_PAGES_PER_CONTEXT = int(os.environ.get("LUSHA_MAX_PAGES_PER_CONTEXT", "50"))
+# Seconds to wait for a free page before giving up, so a leaked slot fails loudly instead of hanging
+ACQUIRE_TIMEOUT = float(os.environ.get("LUSHA_POOL_ACQUIRE_TIMEOUT", "120"))
+
+
+async def _launch_browser(p):
+    try:
+        return await p.chromium.launch(headless=True)
+    except Exception:
+        print("Browser launch failed, attempting to install browsers...")
+        subprocess.run(["playwright", "install", "chromium"])
+        return await p.chromium.launch(headless=True)
+
+
+class _Slot:
+    """
+    One warm browser context and the number of pages it has served.
+    """
+    def __init__(self, generation):
+        self.generation = generation
+        self.context = None
+        self.pages_served = 0
+
+
+class BrowserPool:
+    """
+    Keeps one Chromium instance and a fixed number of warm contexts alive on the
+    shared event loop, so scraper calls don't pay a cold launch each time.
+    """
+    def __init__(self, size=POOL_SIZE, max_pages_per_context=MAX_PAGES_PER_CONTEXT, acquire_timeout=ACQUIRE_TIMEOUT):
+        self.size = size
+        self.max_pages_per_context = max_pages_per_context
+        self.acquire_timeout = acquire_timeout
+        self._playwright = None
+        self._browser = None
+        self._slots = None
+        self._generation = 0
+        self._start_lock = None
+
+    def _is_healthy(self):
+        return self._browser is not None and self._browser.is_connected()
+
+    async def _ensure_started(self):
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._is_healthy():
+                return
+            if self._browser is not None:
+                print("Browser disconnected, relaunching...")
+            await self._teardown()
+            with metrics.span("browser_launch"):
+                self._playwright = await async_playwright().start()
+                self._browser = await _launch_browser(self._playwright)
+            self._generation += 1
+            self._slots = asyncio.Queue()
+            for _ in range(self.size):
+                self._slots.put_nowait(_Slot(self._generation))
+
+    async def _prepare_slot(self, slot):
+        # Recycle contexts that are stale, worn out or left over from a dead browser
+        if slot.context is not None and slot.pages_served >= self.max_pages_per_context:
+            await _close_quietly(slot.context)
+            slot.context = None
+        if slot.context is None:
+            with metrics.span("browser_new_context"):
+                slot.context = await self._browser.new_context()
+                await install_routing(slot.context)
+            slot.pages_served = 0
+
+    async def _next_slot(self):
+        try:
+            return await asyncio.wait_for(self._slots.get(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            metrics.incr("browser_pool_timeout")
+            raise TimeoutError(f"No browser page free after {self.acquire_timeout:g}s (pool size {self.size})") from None
+
+    async def _acquire(self):
+        await self._ensure_started()
+        slot = await self._next_slot()
+        try:
+            await self._prepare_slot(slot)
+            page = await slot.context.new_page()
+        except Exception:
+            # Context is broken; start a fresh one once before giving up
+            await _close_quietly(slot.context)
+            slot.context = None
+            try:
+                await self._ensure_started()
+                if slot.generation != self._generation:
+                    # The browser was relaunched with a full set of slots; wait for one of those
+                    slot = await self._next_slot()
+                await self._prepare_slot(slot)
+                page = await slot.context.new_page()
+            except Exception:
+                self._release(slot)
+                raise
+        slot.pages_served += 1
+        return slot, page
+
+    def _release(self, slot):
+        # Slots from a previous browser generation are dropped: the relaunch already made `size` new ones
+        if slot.generation == self._generation:
+            self._slots.put_nowait(slot)
+
+    @asynccontextmanager
+    async def page(self, stage="default"):
+        """
+        Borrows a fresh page from a warm context; the page is closed on exit.
+        `stage` selects which resource types the page may load (see routing.py).
+        """
+        slot, page = await self._acquire()
+        track_page(page, stage)
+        try:
+            yield page
+        finally:
+            untrack_page(page)
+            await _close_quietly(page)
+            self._release(slot)
+
+    async def _teardown(self):
+        if self._slots is not None:
+            while not self._slots.empty():
+                slot = self._slots.get_nowait()
+                await _close_quietly(slot.context)
+        await _close_quietly(self._browser)
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception:
+                pass
+        self._browser = None
+        self._playwright = None
+
+    async def close(self):
+        if self._start_lock is None:
+            return
+        async with self._start_lock:
+            await self._teardown()
+
+
+async def _close_quietly(resource):
+    if resource is None:
+        return
+    try:
+        await resource.close()
+    except Exception:
+        pass
+
+
+_pool = None
+
+
+def get_pool():
+    """
+    Returns the process-wide browser pool. Must be used from the shared loop.
+    """
+    global _pool
+    if _pool is None:
+        _pool = BrowserPool()
+        register_shutdown(_pool.close)
+    return _pool
@@ -0,0 +1,167 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import metrics
+
+# Persistent on-disk cache for scraped data and AI match results, keyed by (kind, key).
+CACHE_PATH = os.environ.get(
+    "LUSHA_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".lusha_cache", "cache.sqlite3"),
+)
+MAX_ENTRIES = int(os.environ.get("LUSHA_CACHE_MAX_ENTRIES", "50000"))
+# Seconds to wait for another connection's write lock (crawl workers share the file)
+BUSY_TIMEOUT = float(os.environ.get("LUSHA_CACHE_BUSY_TIMEOUT", "10"))
+
+DAY = 24 * 60 * 60
+# kind -> (fresh_ttl, stale_ttl) in seconds. Entries older than fresh_ttl are
+# served stale (and revalidated in the background) until fresh_ttl + stale_ttl.
+TTLS = {
+    "industries": (7 * DAY, 30 * DAY),
+    "countries": (7 * DAY, 30 * DAY),
+    "listings": (1 * DAY, 7 * DAY),
+    "enrichment": (30 * DAY, 60 * DAY),
+    "matches": (30 * DAY, 0),
+}
+DEFAULT_TTL = (1 * DAY, 7 * DAY)
+
+FRESH = "fresh"
+STALE = "stale"
+
+
+class Cache:
+    """
+    Small SQLite-backed key/value store with per-kind TTLs and LRU eviction.
+    Safe to share between threads. Database errors (e.g. "database is locked"
+    under contention) are logged and treated as misses or skipped writes.
+    """
+    def __init__(self, path=CACHE_PATH, max_entries=MAX_ENTRIES, ttls=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttls = dict(TTLS, **(ttls or {}))
+        self._lock = threading.Lock()
+        self._conn = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.counters = {}  # kind -> {"hits", "stale_hits", "misses"}
+
+    def _connect(self):
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " kind TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+                " created_at REAL NOT NULL, accessed_at REAL NOT NULL,"
+                " PRIMARY KEY (kind, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+            self._conn = conn
+        return self._conn
+
+    def _error(self, op, kind, e):
+        print(f"Cache {op} failed for {kind}: {e!r}")
+        metrics.incr("cache_error", kind=kind, op=op)
+
+    def get(self, kind, key):
+        """
+        Returns (value, state) where state is FRESH, STALE or None (miss/expired).
+        """
+        now = time.time()
+        fresh_ttl, stale_ttl = self.ttls.get(kind, DEFAULT_TTL)
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT value, created_at FROM entries WHERE kind = ? AND key = ?", (kind, key)
+                ).fetchone()
+                if row is not None:
+                    value, created_at = row
+                    age = now - created_at
+                    if age > fresh_ttl + stale_ttl:
+                        conn.execute("DELETE FROM entries WHERE kind = ? AND key = ?", (kind, key))
+                        row = None
+                    else:
+                        conn.execute("UPDATE entries SET accessed_at = ? WHERE kind = ? AND key = ?", (now, kind, key))
+            except sqlite3.Error as e:
+                self._error("get", kind, e)
+                row = None
+            if row is None:
+                self._count(kind, "misses")
+                return None, None
+            if age > fresh_ttl:
+                self._count(kind, "stale_hits")
+                return json.loads(value), STALE
+            self._count(kind, "hits")
+            return json.loads(value), FRESH
+
+    def _count(self, kind, counter):
+        setattr(self, counter, getattr(self, counter) + 1)
+        per_kind = self.counters.setdefault(kind, {"hits": 0, "stale_hits": 0, "misses": 0})
+        per_kind[counter] += 1
+        metrics.incr("cache_" + counter, kind=kind)
+
+    def set(self, kind, key, value):
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (kind, key, value, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (kind, key, json.dumps(value), now, now),
+                )
+                self._evict(conn)
+            except sqlite3.Error as e:
+                self._error("set", kind, e)
+
+    def delete(self, kind, key):
+        with self._lock:
+            self._connect().execute("DELETE FROM entries WHERE kind = ? AND key = ?", (kind, key))
+
+    def clear(self, kind=None):
+        with self._lock:
+            conn = self._connect()
+            if kind is None:
+                conn.execute("DELETE FROM entries")
+            else:
+                conn.execute("DELETE FROM entries WHERE kind = ?", (kind,))
+
+    def _evict(self, conn):
+        # Drop least recently used entries once over the size bound
+        count = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM entries WHERE rowid IN (SELECT rowid FROM entries ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+
+    def stats(self):
+        with self._lock:
+            rows = self._connect().execute("SELECT kind, COUNT(*) FROM entries GROUP BY kind").fetchall()
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "by_kind": {kind: dict(counts) for kind, counts in self.counters.items()},
+            "entries": dict(rows),
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Returns the process-wide cache instance.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = Cache()
+        return _cache
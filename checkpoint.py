@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+try:
+    import fcntl
+except ImportError:  # no advisory locks on Windows; checkpoints are then unlocked
+    fcntl = None
+
+# On-disk checkpoints for long scrapes. Each scrape key gets a directory with
+#   state.json        listing progress (URL template, last page parsed, status)
+#   companies.jsonl   companies in listing order, appended as they are found
+#   enriched.jsonl    {"url", "website_url"} appended as enrichment succeeds
+# so a crashed or interrupted scrape picks up where it stopped, and companies
+# stream to disk instead of accumulating in memory. A <digest>.lock file next
+# to the directory keeps two scrapes (threads or processes) out of one checkpoint.
+CHECKPOINT_DIR = os.environ.get(
+    "LUSHA_CHECKPOINT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".lusha_cache", "checkpoints"),
+)
+CHECKPOINT_TTL = 7 * 24 * 60 * 60  # abandoned checkpoints are removed after this long (seconds)
+
+
+def _read_jsonl(path):
+    # A crash can leave a partial last line; anything unparsable is skipped
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+class ScrapeCheckpoint:
+    """
+    Incremental record of one scrape. Not thread-safe: all updates come from
+    the shared event loop.
+    """
+    def __init__(self, key, directory=CHECKPOINT_DIR):
+        self.key = list(key)
+        digest = hashlib.sha256(json.dumps(self.key).encode("utf-8")).hexdigest()[:24]
+        self.path = os.path.join(directory, digest)
+        self.state = {"key": self.key, "template": None, "per_page": None, "last_page": 0,
+                      "listing_complete": None, "updated_at": None}
+        self.listed_urls = set()
+        self.enriched = {}  # url -> website_url
+        self._companies = None
+        self._enrichments = None
+        self._lock = None
+
+    @property
+    def listed(self):
+        return len(self.listed_urls)
+
+    @property
+    def resumed(self):
+        return bool(self.listed_urls or self.state["last_page"])
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def load(self):
+        """
+        Restores progress from disk; returns self. A missing checkpoint is an empty one.
+        """
+        try:
+            with open(self._file("state.json"), encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("key") == self.key:
+                self.state.update(state)
+        except (OSError, ValueError):
+            pass
+        for company in _read_jsonl(self._file("companies.jsonl")):
+            self.listed_urls.add(company["url"])
+        for entry in _read_jsonl(self._file("enriched.jsonl")):
+            self.enriched[entry["url"]] = entry["website_url"]
+        return self
+
+    def _save_state(self):
+        os.makedirs(self.path, exist_ok=True)
+        self.state["updated_at"] = time.time()
+        tmp = self._file("state.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self._file("state.json"))
+
+    def _append(self, handle_attr, name, record):
+        handle = getattr(self, handle_attr)
+        if handle is None:
+            os.makedirs(self.path, exist_ok=True)
+            handle = open(self._file(name), "a", encoding="utf-8")
+            setattr(self, handle_attr, handle)
+        handle.write(json.dumps(record) + "\n")
+        handle.flush()
+
+    def iter_listed(self):
+        """
+        Streams the recorded companies from disk, in listing order.
+        """
+        if self._companies is not None:
+            self._companies.flush()
+        seen = set()
+        for company in _read_jsonl(self._file("companies.jsonl")):
+            if company["url"] not in seen:
+                seen.add(company["url"])
+                yield company
+
+    def add_listed(self, company):
+        """
+        Records a newly listed company; returns False if it was already recorded.
+        """
+        if company["url"] in self.listed_urls:
+            return False
+        self.listed_urls.add(company["url"])
+        self._append("_companies", "companies.jsonl",
+                     {"name": company["name"], "url": company["url"], "linkedin": company.get("linkedin", "N/A")})
+        return True
+
+    def add_enriched(self, url, website_url):
+        if self.enriched.get(url) == website_url:
+            return
+        self.enriched[url] = website_url
+        self._append("_enrichments", "enriched.jsonl", {"url": url, "website_url": website_url})
+
+    def set_pagination(self, template, per_page):
+        self.state["template"] = template
+        self.state["per_page"] = per_page
+        self._save_state()
+
+    def mark_page(self, page_num):
+        # Pages are parsed in order, so everything up to page_num is on disk
+        self.state["last_page"] = max(self.state["last_page"], page_num)
+        self._save_state()
+
+    def finish_listing(self, complete):
+        self.state["listing_complete"] = complete
+        self._save_state()
+
+    def lock(self):
+        """
+        Takes the checkpoint for this scrape until close(); returns False if
+        another scrape already holds it.
+        """
+        if fcntl is None:
+            return True
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        handle = open(self.path + ".lock", "a")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        os.utime(self.path + ".lock")  # so purge_checkpoints() leaves it alone
+        self._lock = handle
+        return True
+
+    def _close_files(self):
+        for attr in ("_companies", "_enrichments"):
+            handle = getattr(self, attr)
+            if handle is not None:
+                handle.close()
+                setattr(self, attr, None)
+
+    def close(self):
+        self._close_files()
+        if self._lock is not None:
+            self._lock.close()  # releases the flock
+            self._lock = None
+
+    def discard(self):
+        """
+        Deletes the checkpoint (after a successful scrape, or to start over).
+        The lock is kept until close().
+        """
+        self._close_files()
+        shutil.rmtree(self.path, ignore_errors=True)
+        self.listed_urls.clear()
+        self.enriched.clear()
+        self.state.update(template=None, per_page=None, last_page=0, listing_complete=None)
+
+
+def purge_checkpoints(directory=CHECKPOINT_DIR, max_age=CHECKPOINT_TTL):
+    """
+    Removes checkpoints that haven't been updated for max_age seconds.
+    """
+    if not os.path.isdir(directory):
+        return
+    cutoff = time.time() - max_age
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    os.remove(path)
+        except OSError:
+            pass
+
+
+def open_checkpoint(key, directory=CHECKPOINT_DIR):
+    """
+    Returns the locked checkpoint for a scrape key, loaded from disk if one
+    exists, or None if another scrape of the same key is using it.
+    """
+    purge_checkpoints(directory)
+    checkpoint = ScrapeCheckpoint(key, directory)
+    if not checkpoint.lock():
+        return None
+    return checkpoint.load()
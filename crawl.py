@@ -0,0 +1,168 @@
+"""
+Sweeps whole industries across countries: builds the work list from
+get_industries() x get_countries(), scrapes the listings on a pool of worker
+processes (each with its own event loop and browser) under one rate limit
+shared by all workers, and merges the companies, deduplicated by URL.
+
+    python crawl.py --industry "Software" --industry "Retail" --max-results 500 -o sweep.jsonl
+    python crawl.py --country Germany --country France --workers 8
+    python crawl.py --list          # print the work list and exit
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from link_classifier import normalize_url
+
+CRAWL_WORKERS = int(os.environ.get("LUSHA_CRAWL_WORKERS", "0")) or os.cpu_count() or 1
+# Seconds between requests across all workers together
+CRAWL_MIN_INTERVAL = float(os.environ.get("LUSHA_CRAWL_MIN_INTERVAL", os.environ.get("LUSHA_MIN_REQUEST_INTERVAL", "0.25")))
+
+
+class GlobalRateLimiter:
+    """
+    Spaces requests from every worker process at least min_interval seconds
+    apart, using a lock and the next free time slot in shared memory.
+    """
+    def __init__(self, lock, next_slot, min_interval):
+        self.lock = lock
+        self.next_slot = next_slot
+        self.min_interval = min_interval
+
+    async def wait(self, url):
+        with self.lock:
+            now = time.time()
+            slot = max(now, self.next_slot.value)
+            self.next_slot.value = slot + self.min_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def _init_worker(lock, next_slot, min_interval):
+    # Runs once in each worker process: later scrapes there share the global limiter
+    import scraper
+    scraper.set_rate_limiter(GlobalRateLimiter(lock, next_slot, min_interval))
+
+
+def _scrape_shard(url, max_results, force_refresh):
+    import scraper
+    return scraper.scrape_companies(url, max_results, force_refresh=force_refresh, resume=True)
+
+
+def _matches(name, wanted):
+    return not wanted or name.strip().lower() in wanted
+
+
+def build_work_list(industries=None, countries=None, force_refresh=False):
+    """
+    Returns [{"industry", "country", "url"}] for every listing of the selected
+    industries and countries (names, case-insensitive; None means all).
+    """
+    from scraper import get_industries, get_countries
+    wanted_industries = {n.strip().lower() for n in industries or []}
+    wanted_countries = {n.strip().lower() for n in countries or []}
+    shards, seen = [], set()
+    for industry in sorted(get_industries(force_refresh=force_refresh), key=lambda i: i["name"]):
+        if not _matches(industry["name"], wanted_industries):
+            continue
+        for country in sorted(get_countries(industry["url"], force_refresh=force_refresh), key=lambda c: c["name"]):
+            if not _matches(country["name"], wanted_countries) or country["url"] in seen:
+                continue
+            seen.add(country["url"])
+            shards.append({"industry": industry["name"], "country": country["name"], "url": country["url"]})
+    return shards
+
+
+def crawl(shards, max_results=200, workers=None, min_interval=None, force_refresh=False,
+          output=None, progress_callback=None):
+    """
+    Scrapes every shard on a process pool and returns (companies, failed).
+    Each company is listed once, with "industry" and "country" from the first
+    listing it was found in and "listings" naming all of them. If output is a
+    path, new companies are appended to it as JSON lines as shards finish.
+    progress_callback(done, total, message) is called after each shard. Failed
+    shards are returned so they can be retried; their progress is checkpointed.
+    """
+    workers = max(1, min(workers or CRAWL_WORKERS, len(shards) or 1))
+    min_interval = CRAWL_MIN_INTERVAL if min_interval is None else min_interval
+    companies = {}
+    failed = []
+    # Spawned workers start clean instead of inheriting the parent's loop and browser threads
+    context = multiprocessing.get_context("spawn")
+    lock, next_slot = context.Lock(), context.Value("d", 0.0, lock=False)
+    out = open(output, "a", encoding="utf-8") if output else None
+    print(f"Crawling {len(shards)} listings on {workers} worker processes...")
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(lock, next_slot, min_interval)) as pool:
+            futures = {pool.submit(_scrape_shard, shard["url"], max_results, force_refresh): shard for shard in shards}
+            for done, future in enumerate(as_completed(futures), 1):
+                shard = futures[future]
+                label = f"{shard['industry']} / {shard['country']}"
+                try:
+                    found = future.result()
+                except Exception as e:
+                    print(f"Crawl of {label} failed: {e!r}")
+                    failed.append(shard)
+                    found = []
+                new = 0
+                for company in found:
+                    key = normalize_url(company["url"])
+                    if key in companies:
+                        companies[key]["listings"].append(label)
+                        continue
+                    company = dict(company, industry=shard["industry"], country=shard["country"], listings=[label])
+                    companies[key] = company
+                    new += 1
+                    if out:
+                        out.write(json.dumps(company) + "\n")
+                if out:
+                    out.flush()
+                message = f"{label}: {len(found)} companies, {new} new ({len(companies)} total)"
+                print(f"[{done}/{len(shards)}] {message}")
+                if progress_callback:
+                    progress_callback(done, len(shards), message)
+    finally:
+        if out:
+            out.close()
+    return list(companies.values()), failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crawl Lusha listings across industries and countries.")
+    parser.add_argument("--industry", action="append", help="industry name to include (repeatable; default all)")
+    parser.add_argument("--country", action="append", help="country name to include (repeatable; default all)")
+    parser.add_argument("--max-results", type=int, default=200, help="companies per listing")
+    parser.add_argument("--workers", type=int, default=None, help=f"worker processes (default {CRAWL_WORKERS})")
+    parser.add_argument("--min-interval", type=float, default=None,
+                        help=f"seconds between requests across all workers (default {CRAWL_MIN_INTERVAL})")
+    parser.add_argument("-o", "--output", help="append companies to this JSON lines file")
+    parser.add_argument("--force-refresh", action="store_true", help="bypass the cache")
+    parser.add_argument("--list", action="store_true", help="print the work list and exit")
+    args = parser.parse_args(argv)
+
+    shards = build_work_list(args.industry, args.country, force_refresh=args.force_refresh)
+    if args.list or not shards:
+        for shard in shards:
+            print(f"{shard['industry']} / {shard['country']}: {shard['url']}")
+        if not shards:
+            print("No listings match the selected industries and countries.")
+        return 0 if shards else 1
+
+    start = time.perf_counter()
+    companies, failed = crawl(shards, args.max_results, workers=args.workers, min_interval=args.min_interval,
+                              force_refresh=args.force_refresh, output=args.output)
+    elapsed = time.perf_counter() - start
+    print(f"Crawled {len(shards) - len(failed)}/{len(shards)} listings: {len(companies)} unique companies "
+          f"in {elapsed:.1f}s ({len(companies) / elapsed:.1f}/s)")
+    for shard in failed:
+        print(f"  failed: {shard['industry']} / {shard['country']} ({shard['url']})")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
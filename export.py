@@ -0,0 +1,143 @@
+import csv
+import io
+import threading
+from collections import OrderedDict
+from openpyxl import Workbook
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = pq = None
+
+# Export layer for result sets: rows are written in chunks by streaming writers
+# (csv, openpyxl write-only mode, pyarrow record batches) and the finished file
+# is cached per (result-set version, format), so reruns don't rebuild it.
+CHUNK_SIZE = 5000
+MAX_CACHED = 8  # generated files kept in memory, least recently used dropped first
+
+# Preferred column order; other keys follow in first-seen order
+LEADING_COLUMNS = ["name", "match_score", "reasoning", "website_url", "url", "linkedin", "industry", "country", "listings"]
+
+FORMATS = {
+    "xlsx": ("Excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ("CSV", "text/csv"),
+    "parquet": ("Parquet", "application/vnd.apache.parquet"),
+}
+
+
+def available_formats():
+    return [fmt for fmt in FORMATS if fmt != "parquet" or pq is not None]
+
+
+def columns_for(rows):
+    seen = OrderedDict()
+    for row in rows:
+        for key in row:
+            seen.setdefault(key, None)
+    leading = [c for c in LEADING_COLUMNS if c in seen]
+    return leading + [c for c in seen if c not in leading]
+
+
+def _cell(value):
+    # Flat values for every format: lists (e.g. listings) are joined, other objects stringified
+    if isinstance(value, (list, tuple, set)):
+        return "; ".join(str(v) for v in value)
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _int_or_none(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return int(round(value))
+
+
+def iter_chunks(rows, chunk_size=CHUNK_SIZE):
+    for start in range(0, len(rows), chunk_size):
+        yield rows[start:start + chunk_size]
+
+
+def write_csv(rows, out, columns=None, chunk_size=CHUNK_SIZE):
+    """
+    Writes rows to a binary file object as UTF-8 CSV (with BOM, for Excel).
+    """
+    columns = columns or columns_for(rows)
+    text = io.TextIOWrapper(out, encoding="utf-8-sig", newline="", write_through=True)
+    try:
+        writer = csv.writer(text)
+        writer.writerow(columns)
+        for chunk in iter_chunks(rows, chunk_size):
+            writer.writerows([_cell(row.get(c)) for c in columns] for row in chunk)
+    finally:
+        text.detach()
+
+
+def write_excel(rows, out, columns=None, sheet_name="Companies"):
+    """
+    Writes rows with openpyxl's write-only mode, which streams rows to the
+    file instead of keeping every cell object in memory.
+    """
+    columns = columns or columns_for(rows)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name)
+    sheet.append(columns)
+    for row in rows:
+        sheet.append([_cell(row.get(c)) for c in columns])
+    workbook.save(out)
+
+
+def write_parquet(rows, out, columns=None, chunk_size=CHUNK_SIZE):
+    """
+    Writes rows as Parquet, one record batch per chunk. Columns are stored as
+    strings except match_score, which is an integer.
+    """
+    if pq is None:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow).")
+    columns = columns or columns_for(rows)
+    schema = pa.schema([(c, pa.int64() if c == "match_score" else pa.string()) for c in columns])
+    with pq.ParquetWriter(out, schema, compression="zstd") as writer:
+        for chunk in iter_chunks(rows, chunk_size):
+            arrays = []
+            for column in columns:
+                values = [_cell(row.get(column)) for row in chunk]
+                if column == "match_score":
+                    arrays.append(pa.array([_int_or_none(v) for v in values], pa.int64()))
+                else:
+                    arrays.append(pa.array([None if v is None else str(v) for v in values], pa.string()))
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+
+
+_WRITERS = {"xlsx": write_excel, "csv": write_csv, "parquet": write_parquet}
+
+_cache = OrderedDict()  # (version, row count, fmt) -> bytes
+_cache_lock = threading.Lock()
+
+
+def export_bytes(rows, fmt, version=None):
+    """
+    Returns the rows exported as `fmt` ("xlsx", "csv" or "parquet"). With a
+    version (any hashable that changes whenever the rows do), the result is
+    cached and reused until that version is evicted.
+    """
+    key = (version, len(rows), fmt)
+    if version is not None:
+        with _cache_lock:
+            if key in _cache:
+                _cache.move_to_end(key)
+                return _cache[key]
+    out = io.BytesIO()
+    _WRITERS[fmt](rows, out)
+    data = out.getvalue()
+    if version is not None:
+        with _cache_lock:
+            _cache[key] = data
+            while len(_cache) > MAX_CACHED:
+                _cache.popitem(last=False)
+    return data
+
+
+def clear_export_cache():
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,31 @@
+import metrics
+
+# Bulk link extraction: one page.evaluate per call instead of several
+# is_visible/inner_text/get_attribute round-trips per anchor.
+
+_EXTRACT_LINKS_JS = """
+(selectors) => {
+    for (const selector of selectors) {
+        const elements = document.querySelectorAll(selector);
+        if (!elements.length) continue;
+        return Array.from(elements, (el) => {
+            const style = window.getComputedStyle(el);
+            const visible = style.visibility !== 'hidden' && style.display !== 'none'
+                && el.getClientRects().length > 0;
+            return {text: el.innerText || '', href: el.getAttribute('href'), visible: visible};
+        });
+    }
+    return [];
+}
+"""
+
+
+async def extract_links(page, selectors):
+    """
+    Returns [{"text", "href", "visible"}] for the anchors matching the first
+    selector in `selectors` that matches anything (later ones are fallbacks).
+    """
+    if isinstance(selectors, str):
+        selectors = [selectors]
+    with metrics.span("extract"):
+        return await page.evaluate(_EXTRACT_LINKS_JS, list(selectors))
@@ -0,0 +1,194 @@
+import threading
+import httpx
+import lxml.html
+import metrics
+from async_loop import register_shutdown
+from rate_control import get_controller, target_for, check_response, Throttled, ServerError
+
+# HTTP-first fetching: directory, listing and company pages are server-rendered,
+# so a pooled keep-alive client plus lxml is usually enough. Callers fall back to
+# the browser when the expected selectors are missing or a bot challenge comes back.
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+TIMEOUT = httpx.Timeout(20.0, connect=10.0)
+LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60)
+
+CHALLENGE_STATUSES = {401, 403, 429, 503}
+# Specific enough not to match ordinary pages that merely embed a reCAPTCHA form
+CHALLENGE_MARKERS = (
+    "cf-challenge", "challenge-platform", "cf-browser-verification", "<title>just a moment",
+    "<title>attention required", "px-captcha", "<title>access denied", "are you a robot",
+)
+
+# Outcomes counted per stage
+HTTP_OK = "http_ok"
+HTTP_MISSING = "http_missing_selector"
+HTTP_CHALLENGE = "http_challenge"
+HTTP_ERROR = "http_error"
+HTTP_THROTTLED = "http_throttled"
+BROWSER = "browser"
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def record(stage, outcome):
+    metrics.incr("fetch", stage=stage, outcome=outcome)
+    with _stats_lock:
+        counts = _stats.setdefault(stage, {})
+        counts[outcome] = counts.get(outcome, 0) + 1
+
+
+def get_fetch_stats():
+    """
+    Returns per-stage outcome counts and the share of fetches served over plain HTTP.
+    """
+    with _stats_lock:
+        snapshot = {stage: dict(counts) for stage, counts in _stats.items()}
+    for counts in snapshot.values():
+        total = counts.get(HTTP_OK, 0) + counts.get(BROWSER, 0)
+        counts["http_hit_rate"] = round(counts.get(HTTP_OK, 0) / total, 3) if total else None
+    return snapshot
+
+
+def reset_fetch_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def is_challenge(status_code, html):
+    if status_code in CHALLENGE_STATUSES:
+        return True
+    head = (html or "")[:20000].lower()
+    return any(marker in head for marker in CHALLENGE_MARKERS)
+
+
+def _selector_to_xpath(selector):
+    # Supports the descendant selectors the scraper uses: "a", "main a", ".cls a", "tag.cls a"
+    steps = []
+    for part in selector.split():
+        tag, _, cls = part.partition(".")
+        step = tag or "*"
+        if cls:
+            step += f"[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]"
+        steps.append(step)
+    return "//" + "//".join(steps)
+
+
+def _is_hidden(element):
+    for node in [element] + list(element.iterancestors()):
+        style = (node.get("style") or "").replace(" ", "").lower()
+        if node.get("hidden") is not None or "display:none" in style or "visibility:hidden" in style:
+            return True
+    return False
+
+
+def parse_links(html, selectors):
+    """
+    Offline counterpart of extract.extract_links(): returns
+    [{"text", "href", "visible"}] for the first selector that matches anything.
+    Visibility only accounts for inline styles and the hidden attribute.
+    """
+    if not html or not html.strip():
+        return []
+    return _links_from_tree(lxml.html.fromstring(html), selectors)
+
+
+def _links_from_tree(tree, selectors):
+    if isinstance(selectors, str):
+        selectors = [selectors]
+    for selector in selectors:
+        elements = tree.xpath(_selector_to_xpath(selector))
+        if elements:
+            return [
+                {
+                    "text": " ".join(el.text_content().split()),
+                    "href": el.get("href"),
+                    "visible": not _is_hidden(el),
+                }
+                for el in elements
+            ]
+    return []
+
+
+_client = None
+
+
+async def _close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_client():
+    """
+    Returns the shared keep-alive client. Must be used from the shared loop.
+    """
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(headers=HEADERS, timeout=TIMEOUT, limits=LIMITS, follow_redirects=True)
+        register_shutdown(_close_client)
+    return _client
+
+
+async def fetch_html(url):
+    """
+    Returns (status_code, final_url, html). Raises Throttled or ServerError
+    for responses the rate controller should back off from and retry.
+    """
+    response = await get_client().get(url)
+    check_response(response.status_code, response.headers)
+    return response.status_code, str(response.url), response.text
+
+
+async def _fetch_html_timed(url, stage):
+    with metrics.span("http_fetch", stage=stage):
+        return await fetch_html(url)
+
+
+async def fetch_links(url, selectors, stage, extra_selectors=(), container=None):
+    """
+    Tries to read links over plain HTTP. Returns {"url": final URL, "links":
+    links for the first of `selectors` that matches, "extra": {selector: links}
+    for each of `extra_selectors`}, or None when the caller should use the
+    browser (request error, bot challenge or none of `selectors` present).
+    If `container` is given and present, an empty match is a valid result
+    (e.g. the page after the last page of a listing). Raises Throttled if the
+    host still throttles us after the retries: the browser would hit the
+    same host.
+    """
+    try:
+        # Paced, adapted and retried per host by the shared rate controller
+        status, final_url, html = await get_controller().call(target_for(url), lambda: _fetch_html_timed(url, stage), url=url)
+    except Throttled:
+        record(stage, HTTP_THROTTLED)
+        raise
+    except (httpx.HTTPError, ServerError) as e:
+        print(f"HTTP fetch failed for {url}: {e!r}; using browser")
+        record(stage, HTTP_ERROR)
+        return None
+    if is_challenge(status, html):
+        record(stage, HTTP_CHALLENGE)
+        return None
+    if status >= 400:
+        record(stage, HTTP_ERROR)
+        return None
+    tree = lxml.html.fromstring(html) if html.strip() else None
+    links = _links_from_tree(tree, selectors) if tree is not None else []
+    if not links and not (container and tree is not None and tree.xpath(_selector_to_xpath(container))):
+        record(stage, HTTP_MISSING)
+        return None
+    record(stage, HTTP_OK)
+    return {
+        "url": final_url,
+        "links": links,
+        "extra": {selector: _links_from_tree(tree, selector) for selector in extra_selectors},
+    }
@@ -0,0 +1,265 @@
+import hashlib
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import metrics
+from scraper import iter_companies
+from ai_matcher import match_companies
+from prerank import shortlist
+from local_scorer import score_companies
+from crawl import build_work_list, crawl
+
+# Background jobs live in this module, outside any Streamlit script run, so
+# reruns and other users' sessions can poll them instead of redoing the work.
+MAX_WORKERS = int(os.environ.get("LUSHA_JOB_WORKERS", "4"))
+JOB_TTL = 60 * 60  # finished jobs are kept this long (seconds) for polling
+MATCH_BATCH = 20  # companies sent to the AI at a time while the scrape is running
+POLL_INTERVAL = 0.5
+
+# Scorers for start_search: the OpenAI matcher, or the offline BM25 scorer in local_scorer.py
+SCORERS = ("ai", "local")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    """
+    A unit of background work with status, progress and partial results.
+    The job function appends to `results` as it goes; readers take snapshots.
+    """
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.status = QUEUED
+        self.done = 0
+        self.total = 0
+        self.message = ""
+        self.error = None
+        self.results = []
+        self.events = []  # (kind, index into results), for jobs that follow this one
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    def set_progress(self, done, total, message=""):
+        self.done, self.total, self.message = done, total, message
+
+
+class JobRunner:
+    """
+    Runs jobs on a thread pool. Submitting a key that matches a job still in
+    flight returns that job instead of starting a duplicate.
+    """
+    def __init__(self, max_workers=MAX_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lusha-job")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._in_flight = {}
+
+    def submit(self, key, fn):
+        with self._lock:
+            self._purge()
+            job = self._in_flight.get(key)
+            if job is not None and not job.finished:
+                return job
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._in_flight[key] = job
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, fn):
+        job.status = RUNNING
+        try:
+            with metrics.span("job", kind=job.key[0]):
+                fn(job)
+            job.status = DONE
+        except Exception as e:
+            traceback.print_exc()
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                if self._in_flight.get(job.key) is job:
+                    del self._in_flight[job.key]
+
+    def _purge(self):
+        cutoff = time.time() - JOB_TTL
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_runner():
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = JobRunner()
+        return _runner
+
+
+def _run_scrape(job, url, max_results, force_refresh):
+    index = {}
+    enriched = 0
+    job.set_progress(0, max_results, "Scraping listing...")
+    # Checkpointed, so a scrape interrupted by a crash or restart resumes on the next search.
+    # The scraper only keeps dedup keys; the job keeps every company, since the UI shows them all.
+    for kind, item in iter_companies(url, max_results=max_results, force_refresh=force_refresh, resume=True):
+        if kind == "listed":
+            index[item['url']] = len(job.results)
+            job.results.append(item)
+        elif kind == "listing_done":
+            job.total = item
+        elif kind == "enriched":
+            enriched += 1
+            job.events.append(("enriched", index[item['url']]))
+            job.set_progress(enriched, max(job.total, len(job.results)), f"Enriched {item['name']}")
+    job.set_progress(enriched, len(job.results), f"Found {len(job.results)} companies")
+
+
+def start_scrape(url, max_results, force_refresh=False):
+    """
+    Starts (or joins) the scrape for this listing URL and size. A
+    force-refresh scrape never joins one that may be served from the cache.
+    """
+    return get_runner().submit(
+        ("scrape", url, max_results, bool(force_refresh)),
+        lambda job: _run_scrape(job, url, max_results, force_refresh),
+    )
+
+
+def _match_into(job, batch, user_profile_text, api_key, progress_callback=None):
+    for company, match_data in zip(batch, match_companies(batch, user_profile_text, api_key, progress_callback=progress_callback)):
+        company.update(match_data)
+
+
+def _score_locally(job, user_profile_text):
+    # Rescores the whole set, since BM25's IDF depends on every company seen so far
+    with metrics.span("match", scorer="local"):
+        for company, match_data in zip(job.results, score_companies(job.results, user_profile_text)):
+            company.update(match_data)
+
+
+def _run_match(job, scrape, user_profile_text, api_key, prerank_k, scorer="ai"):
+    # Works on copies so concurrent users sharing one scrape don't overwrite each other's scores
+    cursor = 0
+    pending = []
+    scored_size = 0  # companies in the set when it was last scored locally
+    while True:
+        scrape_finished = scrape.finished
+        while len(job.results) < len(scrape.results):
+            job.results.append(dict(scrape.results[len(job.results)]))
+        while cursor < len(scrape.events):
+            _, i = scrape.events[cursor]
+            cursor += 1
+            job.results[i].update(scrape.results[i])
+            pending.append(job.results[i])
+        job.set_progress(scrape.done, scrape.total, scrape.message)
+
+        # Match while the scrape is still running (the AI only without pre-ranking).
+        # Local scores are refreshed each time the set has doubled, so rescoring
+        # costs O(n) over the run; the final pass below scores everything.
+        if scorer == "local":
+            if not scrape_finished and pending and len(job.results) >= max(MATCH_BATCH, 2 * scored_size):
+                _score_locally(job, user_profile_text)
+                scored_size = len(job.results)
+            pending = []
+        elif not prerank_k and (len(pending) >= MATCH_BATCH or (scrape_finished and pending)):
+            _match_into(job, pending, user_profile_text, api_key)
+            pending = []
+        if scrape_finished:
+            break
+        time.sleep(POLL_INTERVAL)
+
+    if scrape.status == FAILED:
+        raise RuntimeError(f"Scrape failed: {scrape.error}")
+
+    if scorer == "local":
+        # Companies listed but never enriched still get a score from their name
+        _score_locally(job, user_profile_text)
+    elif prerank_k:
+        companies = job.results
+        to_match = companies
+        if len(companies) > prerank_k:
+            shortlisted, similarity = shortlist(companies, user_profile_text, prerank_k)
+            keep = set(shortlisted)
+            for i, company in enumerate(companies):
+                if i not in keep:
+                    company.update({"match_score": 0, "reasoning": f"Skipped by local pre-ranking (similarity {similarity[i]:.2f})."})
+            to_match = [companies[i] for i in shortlisted]
+        job.set_progress(0, len(to_match), "Analyzing matches...")
+        _match_into(job, to_match, user_profile_text, api_key,
+                    progress_callback=lambda done, total: job.set_progress(done, total, "Analyzing matches..."))
+    # Companies the AI couldn't score (after rate-control retries) carry an "error" key
+    failed = sum(1 for company in job.results if company.get('error'))
+    message = f"Analysis complete; {failed} companies could not be scored" if failed else "Analysis complete"
+    job.set_progress(len(job.results), len(job.results), message)
+
+
+def start_search(url, max_results, user_profile_text=None, api_key=None, prerank_k=None, force_refresh=False,
+                 scorer="ai"):
+    """
+    Starts the scrape and, if a profile is given, a matching job that follows
+    it. scorer is "ai" (needs an API key; without one the local scorer is used)
+    or "local". Returns the job the UI should poll.
+    """
+    if scorer not in SCORERS:
+        raise ValueError(f"Unknown scorer {scorer!r}; expected one of {SCORERS}")
+    scrape = start_scrape(url, max_results, force_refresh=force_refresh)
+    if not user_profile_text:
+        return scrape
+    if not api_key:
+        scorer = "local"
+    profile_hash = hashlib.sha256(user_profile_text.encode("utf-8")).hexdigest()
+    if scorer == "local":
+        api_key, prerank_k = None, None
+    key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest() if api_key else None
+    return get_runner().submit(
+        ("match", scrape.id, profile_hash, key_hash, prerank_k, scorer),
+        lambda job: _run_match(job, scrape, user_profile_text, api_key, prerank_k, scorer),
+    )
+
+
+def _run_crawl(job, industries, countries, max_results, workers, force_refresh):
+    job.set_progress(0, 0, "Building the work list...")
+    shards = build_work_list(industries, countries, force_refresh=force_refresh)
+    if not shards:
+        raise RuntimeError("No listings match the selected industries and countries.")
+    job.set_progress(0, len(shards), f"Crawling {len(shards)} listings...")
+    companies, failed = crawl(shards, max_results, workers=workers, force_refresh=force_refresh,
+                              progress_callback=lambda done, total, message: job.set_progress(done, total, message))
+    job.results.extend(companies)
+    message = f"Crawled {len(shards) - len(failed)}/{len(shards)} listings, {len(companies)} unique companies"
+    if failed:
+        message += f"; {len(failed)} failed (run again to resume them)"
+    job.set_progress(len(shards), len(shards), message)
+
+
+def start_crawl(industries, countries=None, max_results=200, workers=None, force_refresh=False):
+    """
+    Starts (or joins) a multi-process crawl over the given industry and
+    country names (None or empty means all). Results arrive when it finishes.
+    """
+    industries, countries = tuple(sorted(industries or ())), tuple(sorted(countries or ()))
+    return get_runner().submit(
+        ("crawl", industries, countries, max_results, workers, bool(force_refresh)),
+        lambda job: _run_crawl(job, list(industries), list(countries), max_results, workers, force_refresh),
+    )
+
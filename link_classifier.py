@@ -0,0 +1,200 @@
+import os
+import re
+from urllib.parse import urlsplit, urlunsplit
+
+# Pure-Python filtering of extracted links (see extract.py / http_fetch.py).
+# Everything is precompiled once, and dedup uses a set of normalized URLs.
+
+# Overridable so the scraper can be pointed at a local mock site (see benchmarks/)
+BASE_URL = os.environ.get("LUSHA_BASE_URL", "https://www.lusha.com").rstrip("/")
+
+# Link texts that are site chrome, not companies (matched case-insensitively)
+SKIP_KEYWORDS = frozenset(k.lower() for k in [
+    "Privacy Policy", "Terms of Use", "Start for free", "Login", "Sign Up", "About Us",
+    "Contact", "Lusha", "Twitter", "Facebook", "LinkedIn", "Instagram",
+])
+
+# Hrefs that are never a company's own website
+_HERO_EXCLUDE = re.compile(r"lusha\.com|linkedin\.com|javascript")
+_FALLBACK_EXCLUDE = re.compile(r"lusha\.com|linkedin|twitter|facebook|instagram|google|maps", re.IGNORECASE)
+
+
+def absolute_url(href, base_url=BASE_URL):
+    if href.startswith("/"):
+        return base_url + href
+    return href
+
+
+def normalize_url(url):
+    """
+    Dedup key for a URL: lowercase scheme and host, no fragment, no trailing slash.
+    """
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+
+
+def classify_company_link(link, base_url=BASE_URL):
+    """
+    Returns {"name", "url"} if an extracted link looks like a company entry, else None.
+    """
+    if not link.get("visible", True):
+        return None
+    name = link.get("text")
+    if not name:
+        return None
+    name = name.strip()
+    if len(name) < 2 or name.lower() in SKIP_KEYWORDS:
+        return None
+    href = link.get("href")
+    if not href or "javascript" in href:
+        return None
+    return {"name": name, "url": absolute_url(href, base_url)}
+
+
+class ListingParser:
+    """
+    Accumulates unique companies across the pages of one listing, stopping at
+    max_results. on_company(company) is called for each new company. With
+    keep_results=False only the dedup keys are held (the caller streams the
+    companies elsewhere, e.g. to a checkpoint).
+    """
+    def __init__(self, max_results, on_company=None, base_url=BASE_URL, keep_results=True):
+        self.max_results = max_results
+        self.on_company = on_company
+        self.base_url = base_url
+        self.keep_results = keep_results
+        self.results = []
+        self.seen = set()
+        self.seeded = set()
+        self.count = 0
+        self.replayed = 0  # companies on the last page that were seeded
+
+    @property
+    def full(self):
+        return self.count >= self.max_results
+
+    def seed(self, urls):
+        """
+        Marks companies found by an earlier, interrupted run as already listed.
+        """
+        for url in urls:
+            key = normalize_url(url)
+            if key not in self.seen:
+                self.seen.add(key)
+                self.seeded.add(key)
+                self.count += 1
+
+    def add_page(self, links):
+        """
+        Parses one page's links; returns the number of new companies added.
+        """
+        added = 0
+        self.replayed = 0
+        for link in links:
+            if self.full:
+                break
+            company = classify_company_link(link, self.base_url)
+            if company is None:
+                continue
+            key = normalize_url(company["url"])
+            if key in self.seen:
+                if key in self.seeded:
+                    self.replayed += 1
+                continue
+            self.seen.add(key)
+            company["linkedin"] = "N/A"
+            if self.keep_results:
+                self.results.append(company)
+            self.count += 1
+            added += 1
+            if self.on_company:
+                self.on_company(company)
+        return added
+
+    def exhausted(self, added):
+        # A page with nothing new ends the listing, unless it only repeated
+        # companies from the run being resumed
+        return added == 0 and self.replayed == 0
+
+
+def website_from_hero(hero_links):
+    # First hero-section link that points off Lusha/LinkedIn
+    for link in hero_links:
+        href = link.get("href")
+        if href and not _HERO_EXCLUDE.search(href):
+            return href
+    return None
+
+
+def website_from_page(all_links):
+    # Fallback: external link whose text looks like a website
+    for link in all_links:
+        href = link.get("href")
+        if not href or ("http" not in href and "www" not in href):
+            continue
+        if _FALLBACK_EXCLUDE.search(href):
+            continue
+        text = link.get("text") or ""
+        if "www" in text or "Website" in text:
+            return href
+    return None
+
+
+if __name__ == "__main__":
+    # Micro-benchmark on synthetic listing pages: python link_classifier.py
+    import random
+    import time
+
+    def synthetic_page(n, seed):
+        rng = random.Random(seed)
+        chrome = ["Privacy Policy", "Login", "Contact", "Next", "2", "Twitter"]
+        links = []
+        for i in range(n):
+            if rng.random() < 0.1:
+                links.append({"text": rng.choice(chrome), "href": "/company-search/", "visible": True})
+            else:
+                c = rng.randrange(n // 2)  # plenty of duplicates
+                href = f"/company-search/company/acme-{c}/" + ("#top" if rng.random() < 0.1 else "")
+                links.append({"text": f"Acme {c}", "href": href, "visible": rng.random() > 0.02})
+        return links
+
+    pages = [synthetic_page(10_000, seed) for seed in range(5)]
+
+    def legacy(pages, max_results):
+        # The previous inline loop: list scan dedup and per-link keyword rebuild
+        results = []
+        for links in pages:
+            for link in links:
+                if not link["visible"]: continue
+                name, href = link["text"], link["href"]
+                if not name: continue
+                name = name.strip()
+                if len(name) < 2: continue
+                skip_keywords = ["Privacy Policy", "Terms of Use", "Start for free", "Login", "Sign Up", "About Us", "Contact", "Lusha", "Twitter", "Facebook", "LinkedIn", "Instagram"]
+                if any(k.lower() == name.lower() for k in skip_keywords): continue
+                if not href or "javascript" in href: continue
+                if href.startswith("/"): href = "https://www.lusha.com" + href
+                if any(r['url'] == href for r in results): continue
+                results.append({"name": name, "url": href, "linkedin": "N/A"})
+                if len(results) >= max_results: return results
+        return results
+
+    for max_results in (200, 2_000, 10_000):
+        start = time.perf_counter()
+        old = legacy(pages, max_results)
+        old_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parser = ListingParser(max_results)
+        for links in pages:
+            parser.add_page(links)
+            if parser.full:
+                break
+        new_s = time.perf_counter() - start
+
+        # Fragments no longer create duplicates, so the new parser can only find fewer
+        assert len(parser.results) <= len(old)
+        assert len({normalize_url(c["url"]) for c in parser.results}) == len(parser.results)
+        print(f"max_results={max_results:>6}: legacy {old_s * 1000:8.1f} ms ({len(old)} companies), "
+              f"ListingParser {new_s * 1000:7.1f} ms ({len(parser.results)} companies)")
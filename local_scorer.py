@@ -0,0 +1,178 @@
+import math
+import re
+from collections import Counter
+import numpy as np
+from prerank import tokenize
+
+# Offline, deterministic alternative to ai_matcher.match_companies: BM25F-style
+# scoring of each company's name, domain and description against keywords
+# extracted from the profile. Same return shape, no network, CPU only.
+
+# Field weights for the term frequencies (BM25F)
+FIELD_WEIGHTS = {"name": 2.0, "domain": 1.5, "description": 1.0}
+K1 = 1.2
+B = 0.75
+MAX_KEYWORDS = 60
+# A company whose score reaches this fraction of the best possible score
+# (a document containing every profile keyword) gets 100
+FULL_MATCH_FRACTION = 0.25
+REASON_TERMS = 3
+
+_HOST_RE = re.compile(r"^(?:[a-z][a-z0-9+.-]*:)?//(?:www\.)?([^/:?#]+)", re.IGNORECASE)
+
+
+def extract_keywords(user_profile_text, max_keywords=MAX_KEYWORDS):
+    """
+    Returns {term: weight} for the profile: unigrams and adjacent-word bigrams
+    (joined with a space), weighted 1 + log(count). Bigrams only count when the
+    phrase occurs more than once or both words are rare enough to be skills.
+    """
+    tokens = tokenize(user_profile_text)
+    counts = Counter(tokens)
+    bigrams = Counter(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    for phrase, count in bigrams.items():
+        a, b = phrase.split(" ")
+        if count > 1 or (counts[a] == 1 and counts[b] == 1 and len(a) > 2 and len(b) > 2):
+            counts[phrase] = count
+    ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:max_keywords]
+    return {term: 1.0 + math.log(count) for term, count in ranked}
+
+
+def _domain(company):
+    website = company.get('website_url') or ""
+    if not website or website == "N/A":
+        return ""
+    match = _HOST_RE.match(website if "//" in website else "//" + website)
+    return match.group(1) if match else ""
+
+
+def _fields(company):
+    return (
+        (FIELD_WEIGHTS["name"], company.get('name') or ""),
+        (FIELD_WEIGHTS["domain"], _domain(company)),
+        (FIELD_WEIGHTS["description"], company.get('description') or ""),
+    )
+
+
+def _doc_terms(company, vocabulary=None):
+    """
+    Weighted term frequencies over all fields (bigrams within a field), and the
+    weighted document length. With a vocabulary, only those terms are counted.
+    """
+    terms = {}
+    length = 0.0
+    for weight, text in _fields(company):
+        tokens = tokenize(text)
+        length += weight * len(tokens)
+        for term in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            if vocabulary is None or term in vocabulary:
+                terms[term] = terms.get(term, 0.0) + weight
+    return terms, length
+
+
+class InvertedIndex:
+    """
+    Postings (document ids and weighted term frequencies) per term, stored as
+    NumPy arrays so a query is a handful of vectorized scatter-adds. Pass a
+    vocabulary to index only the terms a query can use.
+    """
+    def __init__(self, companies, vocabulary=None):
+        self.size = len(companies)
+        postings = {}
+        lengths = np.zeros(self.size, dtype=np.float32)
+        for doc_id, company in enumerate(companies):
+            terms, lengths[doc_id] = _doc_terms(company, vocabulary)
+            for term, tf in terms.items():
+                ids, tfs = postings.setdefault(term, ([], []))
+                ids.append(doc_id)
+                tfs.append(tf)
+        self.lengths = lengths
+        self.avg_length = float(lengths.mean()) if self.size and lengths.mean() > 0 else 1.0
+        self.postings = {
+            term: (np.array(ids, dtype=np.int32), np.array(tfs, dtype=np.float32))
+            for term, (ids, tfs) in postings.items()
+        }
+
+    def idf(self, term):
+        df = len(self.postings[term][0]) if term in self.postings else 0
+        return math.log(1 + (self.size - df + 0.5) / (df + 0.5))
+
+    def score(self, keywords):
+        """
+        Returns (scores, contributions) where contributions maps each matched
+        keyword to its per-document score array.
+        """
+        scores = np.zeros(self.size, dtype=np.float32)
+        contributions = {}
+        norm = K1 * (1 - B + B * self.lengths / self.avg_length)
+        for term, weight in keywords.items():
+            if term not in self.postings:
+                continue
+            ids, tfs = self.postings[term]
+            partial = np.zeros(self.size, dtype=np.float32)
+            partial[ids] = weight * self.idf(term) * tfs * (K1 + 1) / (tfs + norm[ids])
+            scores += partial
+            contributions[term] = partial
+        return scores, contributions
+
+    def ideal_score(self, keywords):
+        # Score of an average-length document containing each keyword once
+        return sum(weight * self.idf(term) for term, weight in keywords.items())
+
+
+def score_companies(companies, user_profile_text):
+    """
+    Scores every company against the profile locally. Returns a list of
+    {"match_score", "reasoning"} in the same order as companies, like
+    ai_matcher.match_companies.
+    """
+    if not companies:
+        return []
+    keywords = extract_keywords(user_profile_text)
+    if not keywords:
+        return [{"match_score": 0, "reasoning": "Local score: the profile has no usable keywords."} for _ in companies]
+
+    index = InvertedIndex(companies, vocabulary=set(keywords))
+    scores, contributions = index.score(keywords)
+    reference = max(float(scores.max()), index.ideal_score(keywords) * FULL_MATCH_FRACTION, 1e-6)
+    percent = np.clip(np.rint(100 * scores / reference), 0, 100).astype(int)
+
+    # Top matched keywords per company, for the reasoning line
+    terms = list(contributions)
+    top = []
+    if terms:
+        matrix = np.stack([contributions[t] for t in terms], axis=1)
+        order = np.argsort(-matrix, axis=1, kind="stable")[:, :REASON_TERMS]
+        top = np.where(np.take_along_axis(matrix, order, axis=1) > 0, order, -1).tolist()
+    results = []
+    for i in range(len(companies)):
+        matched = [terms[j] for j in top[i] if j >= 0] if terms else []
+        if matched:
+            reasoning = f"Local score: matches profile keywords {', '.join(matched)}."
+        else:
+            reasoning = "Local score: no profile keywords in the name, domain or description."
+        results.append({"match_score": int(percent[i]), "reasoning": reasoning})
+    return results
+
+
+if __name__ == "__main__":
+    # Timing on synthetic companies: python local_scorer.py
+    import random
+    import time
+
+    rng = random.Random(0)
+    words = ("data analytics cloud software python retail health fintech logistics security machine learning "
+             "platform solutions consulting marketing energy media travel robotics payments").split()
+    companies = [
+        {"name": " ".join(rng.sample(words, 2)).title() + f" {i}",
+         "website_url": f"https://www.{rng.choice(words)}-{i}.com",
+         "description": " ".join(rng.choices(words, k=12))}
+        for i in range(10_000)
+    ]
+    profile = "Senior Python data engineer: machine learning platforms, cloud analytics and data pipelines for fintech."
+    for n in (1_000, 10_000):
+        start = time.perf_counter()
+        results = score_companies(companies[:n], profile)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = max(range(n), key=lambda i: results[i]["match_score"])
+        print(f"{n:>6} companies: {elapsed:6.1f} ms; best {companies[best]['name']!r}: {results[best]}")
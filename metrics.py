@@ -0,0 +1,174 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Structured instrumentation: spans (timed blocks) and counters are emitted as
+# events to every registered sink. The in-process registry aggregates them for
+# the app's performance panel; LUSHA_METRICS_LOG=<path> (or "-" for stderr)
+# also writes one JSON line per event.
+METRICS_LOG = os.environ.get("LUSHA_METRICS_LOG", "")
+MAX_SAMPLES_PER_SPAN = 1000
+
+SPAN = "span"
+COUNTER = "counter"
+
+
+def metric_key(name, tags):
+    # "navigate[stage=listing]"; tags are sorted so keys are stable
+    if not tags:
+        return name
+    return name + "[" + ",".join(f"{k}={v}" for k, v in sorted(tags.items())) + "]"
+
+
+def parse_key(key):
+    # Inverse of metric_key: "navigate[stage=listing]" -> ("navigate", {"stage": "listing"})
+    name, _, tags = key.partition("[")
+    if not tags:
+        return name, {}
+    return name, dict(tag.split("=", 1) for tag in tags[:-1].split(","))
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Registry:
+    """
+    In-process sink that aggregates span timings and counter totals.
+    """
+    def __init__(self, max_samples=MAX_SAMPLES_PER_SPAN):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._spans = {}     # key -> {"count", "errors", "total_ms", "max_ms", "samples"}
+        self._counters = {}  # key -> value
+
+    def __call__(self, event):
+        key = metric_key(event["name"], event.get("tags"))
+        with self._lock:
+            if event["type"] == SPAN:
+                agg = self._spans.setdefault(key, {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "samples": []})
+                agg["count"] += 1
+                agg["errors"] += 0 if event["ok"] else 1
+                agg["total_ms"] += event["ms"]
+                agg["max_ms"] = max(agg["max_ms"], event["ms"])
+                agg["samples"].append(event["ms"])
+                if len(agg["samples"]) > self.max_samples:
+                    del agg["samples"][:len(agg["samples"]) - self.max_samples]
+            else:
+                self._counters[key] = self._counters.get(key, 0) + event["value"]
+
+    def snapshot(self):
+        """
+        Returns {"spans": {key: count, errors, total/mean/p50/p95/max in ms},
+        "counters": {key: value}}. Percentiles cover the most recent samples.
+        """
+        with self._lock:
+            spans = {key: dict(agg, samples=sorted(agg["samples"])) for key, agg in self._spans.items()}
+            counters = dict(self._counters)
+        return {
+            "spans": {
+                key: {
+                    "count": agg["count"],
+                    "errors": agg["errors"],
+                    "total_ms": round(agg["total_ms"], 1),
+                    "mean_ms": round(agg["total_ms"] / agg["count"], 1),
+                    "p50_ms": round(_percentile(agg["samples"], 50), 1),
+                    "p95_ms": round(_percentile(agg["samples"], 95), 1),
+                    "max_ms": round(agg["max_ms"], 1),
+                }
+                for key, agg in spans.items()
+            },
+            "counters": counters,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+
+
+class JsonLinesSink:
+    """
+    Writes each event as one JSON line to a file path, or to stderr for "-".
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        if path == "-":
+            self._stream = sys.stderr
+        else:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._stream = open(path, "a", buffering=1, encoding="utf-8")
+
+    def __call__(self, event):
+        line = json.dumps(event, default=str)
+        with self._lock:
+            self._stream.write(line + "\n")
+
+
+registry = Registry()
+_sinks = [registry]
+if METRICS_LOG:
+    _sinks.append(JsonLinesSink(METRICS_LOG))
+
+
+def add_sink(sink):
+    """
+    Registers a callable that receives every event dict.
+    """
+    _sinks.append(sink)
+
+
+def remove_sink(sink):
+    if sink in _sinks:
+        _sinks.remove(sink)
+
+
+def _emit(event):
+    for sink in list(_sinks):
+        try:
+            sink(event)
+        except Exception as e:
+            print(f"Metrics sink {sink!r} failed: {e!r}")
+
+
+def observe(name, ms, ok=True, **tags):
+    """
+    Records a span measured elsewhere (e.g. a readiness wait).
+    """
+    _emit({"type": SPAN, "name": name, "ms": round(ms, 3), "ok": ok, "tags": tags, "ts": time.time()})
+
+
+def incr(name, value=1, **tags):
+    if value:
+        _emit({"type": COUNTER, "name": name, "value": value, "tags": tags, "ts": time.time()})
+
+
+@contextmanager
+def span(name, **tags):
+    """
+    Times the enclosed block (usable inside coroutines too). Exceptions are
+    counted as errors and re-raised.
+    """
+    start = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        observe(name, (time.perf_counter() - start) * 1000, ok=ok, **tags)
+
+
+def get_metrics():
+    return registry.snapshot()
+
+
+def reset_metrics():
+    registry.reset()
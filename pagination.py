@@ -0,0 +1,68 @@
+import re
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Works out how a listing addresses its pages from the links on page 1, so
+# pages 2..N can be fetched directly instead of clicking "Next" one at a time.
+
+PAGE_PLACEHOLDER = "{page}"
+_NEXT_TEXT = re.compile(r"^\s*(next|›|»|>)\s*$", re.IGNORECASE)
+
+
+def _candidate_hrefs(page_url, links):
+    # Links that should point at page 2: the "2" page number or a "Next" link
+    for link in links:
+        text = (link.get("text") or "").strip()
+        href = link.get("href")
+        if not href or href.startswith(("javascript", "#")):
+            continue
+        if text == "2" or _NEXT_TEXT.match(text):
+            yield urljoin(page_url, href)
+
+
+def _template_from(page_url, candidate):
+    base, cand = urlsplit(page_url), urlsplit(candidate)
+    if (base.scheme, base.netloc) != (cand.scheme, cand.netloc):
+        return None
+
+    # Query parameter, e.g. ?page=2
+    base_query = dict(parse_qsl(base.query))
+    cand_query = parse_qsl(cand.query)
+    for i, (key, value) in enumerate(cand_query):
+        if value != "2" or base_query.get(key) not in (None, "1") or cand.path.rstrip("/") != base.path.rstrip("/"):
+            continue
+        others = {k: v for k, v in cand_query if k != key}
+        if others != {k: v for k, v in base_query.items() if k != key}:
+            continue
+        query = urlencode(cand_query[:i] + [(key, "__PAGE__")] + cand_query[i + 1:])
+        template = urlunsplit((cand.scheme, cand.netloc, cand.path, query, ""))
+        return template.replace("__PAGE__", PAGE_PLACEHOLDER)
+
+    # Path segment, e.g. /listing/2/ or /listing/page/2
+    base_parts = [p for p in base.path.split("/") if p]
+    cand_parts = [p for p in cand.path.split("/") if p]
+    if base_parts and base_parts[-1] == "1":
+        base_parts = base_parts[:-1]
+    for extra in (["2"], ["page", "2"]):
+        if cand_parts == base_parts + extra:
+            path = "/" + "/".join(base_parts + extra[:-1] + [PAGE_PLACEHOLDER])
+            if cand.path.endswith("/"):
+                path += "/"
+            return urlunsplit((cand.scheme, cand.netloc, path, cand.query, ""))
+    return None
+
+
+def infer_page_url_template(page_url, links):
+    """
+    Returns a URL template with a "{page}" placeholder, inferred from the
+    page-2/"Next" links on the first listing page, or None if there is no
+    recognisable pattern (the caller then falls back to clicking "Next").
+    """
+    for candidate in _candidate_hrefs(page_url, links):
+        template = _template_from(page_url, candidate)
+        if template:
+            return template
+    return None
+
+
+def page_url(template, page_num):
+    return template.replace(PAGE_PLACEHOLDER, str(page_num))
@@ -0,0 +1,65 @@
+import math
+import re
+from collections import Counter
+import numpy as np
+
+# Local TF-IDF pre-ranking: shortlists the companies most similar to the profile
+# so only the top candidates are sent to the LLM matcher. CPU only, no network.
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the to was were will with
+i me my we our you your he she they them this these those not but if so than then there
+www http https com net org html php nl de uk co io
+""".split())
+
+
+def tokenize(text):
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def company_text(company):
+    return " ".join(str(company.get(field) or "") for field in ("name", "website_url", "description"))
+
+
+def similarity_scores(companies, user_profile_text):
+    """
+    Returns a NumPy array with the TF-IDF cosine similarity of each company to the profile.
+    """
+    docs = [Counter(tokenize(company_text(c))) for c in companies]
+    profile = Counter(tokenize(user_profile_text))
+    if not docs or not profile:
+        return np.zeros(len(docs), dtype=np.float32)
+
+    # Smoothed IDF over the companies plus the profile itself
+    df = Counter()
+    for doc in docs:
+        df.update(doc.keys())
+    df.update(profile.keys())
+    n = len(docs) + 1
+    idf = {term: math.log((1 + n) / (1 + count)) + 1 for term, count in df.items()}
+
+    # Only the profile's terms contribute to the dot product, so the dense matrix
+    # is companies x profile vocabulary; full document norms are computed separately.
+    vocab = list(profile)
+    vocab_idf = np.array([idf[t] for t in vocab], dtype=np.float32)
+    profile_vec = np.array([profile[t] for t in vocab], dtype=np.float32) * vocab_idf
+    matrix = np.array([[doc.get(t, 0) for t in vocab] for doc in docs], dtype=np.float32) * vocab_idf
+    doc_norms = np.array(
+        [math.sqrt(sum((count * idf[t]) ** 2 for t, count in doc.items())) for doc in docs],
+        dtype=np.float32,
+    )
+
+    denom = doc_norms * np.linalg.norm(profile_vec)
+    dots = matrix @ profile_vec
+    return np.divide(dots, denom, out=np.zeros_like(dots), where=denom > 0)
+
+
+def shortlist(companies, user_profile_text, top_k):
+    """
+    Returns (indices of the top_k most similar companies in rank order, all scores).
+    """
+    scores = similarity_scores(companies, user_profile_text)
+    # Stable sort keeps scraping order among equal scores
+    order = np.argsort(-scores, kind="stable")
+    return [int(i) for i in order[:top_k]], scores
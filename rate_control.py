@@ -0,0 +1,318 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+import metrics
+
+# Adaptive rate control shared by HTTP fetches, browser navigations and OpenAI
+# calls. Each target (a host, or "openai") gets an AIMD concurrency limit and a
+# token bucket: successes raise both additively, throttling (429 / Retry-After)
+# halves them and pauses the target, errors and latency spikes trim them.
+# Failed calls are retried with jittered exponential backoff.
+
+# Requests per second to one host to start with (0 = no token bucket)
+_interval = float(os.environ.get("LUSHA_MIN_REQUEST_INTERVAL", "0.25"))
+HOST_RATE = 1 / _interval if _interval > 0 else 0
+HOST_MAX_RATE = float(os.environ.get("LUSHA_MAX_REQUEST_RATE", str(max(HOST_RATE * 2, 8) if HOST_RATE else 0)))
+HOST_CONCURRENCY = int(os.environ.get("LUSHA_HOST_CONCURRENCY", "4"))
+HOST_MAX_CONCURRENCY = int(os.environ.get("LUSHA_HOST_MAX_CONCURRENCY", "8"))
+
+RETRIES = int(os.environ.get("LUSHA_RETRIES", "2"))
+BACKOFF = 1.0  # seconds; attempt n waits up to BACKOFF * 2**n (full jitter)
+MAX_BACKOFF = 30.0
+THROTTLE_PAUSE = 5.0  # seconds a target is paused after a 429 without Retry-After
+MAX_RETRY_AFTER = 120.0
+
+# AIMD tuning
+DECREASE_ON_THROTTLE = 0.5
+DECREASE_ON_ERROR = 0.75
+DECREASE_ON_SLOW = 0.9
+SLOW_FACTOR = 3.0  # a call slower than this many times the average counts as congestion
+LATENCY_ALPHA = 0.1  # EWMA weight of each new latency sample
+MIN_SAMPLES = 5  # latency samples needed before slowness is judged
+RATE_STEP = 0.05  # requests/second added per success
+
+OK = "ok"
+SLOW = "slow"
+ERROR = "error"
+THROTTLED = "throttled"
+FATAL = "fatal"  # not retried and not held against the target (e.g. a 400)
+
+
+class Throttled(Exception):
+    """
+    The target asked us to slow down (HTTP 429, or a 503 with Retry-After).
+    """
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ServerError(Exception):
+    """
+    A transient server-side failure (5xx) worth retrying.
+    """
+
+
+def target_for(url):
+    return urlparse(url).netloc or url
+
+
+def _header(headers, name):
+    if not headers:
+        return None
+    value = headers.get(name)
+    if value is None:
+        value = headers.get(name.title())
+    return value
+
+
+def parse_retry_after(value):
+    """
+    Returns the Retry-After header (seconds or an HTTP date) in seconds, or None.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError, OverflowError):
+            return None
+    return max(0.0, min(seconds, MAX_RETRY_AFTER))
+
+
+def check_response(status, headers=None):
+    """
+    Raises Throttled or ServerError for responses that should slow us down or
+    be retried. A 503 without Retry-After is left alone: bot challenges use it.
+    """
+    retry_after = parse_retry_after(_header(headers, "retry-after"))
+    if status == 429 or (status == 503 and retry_after is not None):
+        raise Throttled(f"HTTP {status}", retry_after)
+    if status in (500, 502, 504):
+        raise ServerError(f"HTTP {status}")
+
+
+def classify(exc):
+    """
+    Returns (outcome, retry_after) for an exception raised by a controlled call.
+    Works with httpx, Playwright and OpenAI errors without importing them.
+    """
+    if isinstance(exc, Throttled):
+        return THROTTLED, exc.retry_after
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    if isinstance(status, int):
+        headers = getattr(getattr(exc, "response", None), "headers", None)
+        retry_after = parse_retry_after(_header(headers, "retry-after"))
+        if status == 429 or (status == 503 and retry_after is not None):
+            return THROTTLED, retry_after
+        if status == 408 or status >= 500:
+            return ERROR, None
+        return FATAL, None
+    # Timeouts, dropped connections, navigation failures
+    return ERROR, None
+
+
+def backoff_delay(attempt, retry_after=None):
+    # Full jitter, or the server's Retry-After plus a little jitter
+    if retry_after is not None:
+        return retry_after + random.uniform(0, BACKOFF)
+    return random.uniform(0, min(MAX_BACKOFF, BACKOFF * (2 ** attempt)))
+
+
+class TargetLimiter:
+    """
+    Concurrency limit (AIMD) plus token bucket for one target. Used from the
+    shared event loop only.
+    """
+    def __init__(self, name, concurrency=HOST_CONCURRENCY, max_concurrency=HOST_MAX_CONCURRENCY,
+                 rate=HOST_RATE, max_rate=HOST_MAX_RATE, burst=1):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = float(max(1, min(concurrency, self.max_concurrency)))
+        self.min_rate = rate / 4 if rate else 0
+        self.max_rate = max(rate, max_rate) if rate else 0
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.latency = None
+        self.samples = 0
+        self.counts = {OK: 0, SLOW: 0, ERROR: 0, THROTTLED: 0, FATAL: 0}
+        self._updated = time.monotonic()
+        self._last_decrease = 0.0
+        self._waiters = deque()
+
+    async def acquire(self):
+        # A concurrency slot first, then a token (reserved ahead, so waiters queue up in order)
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except BaseException:
+                self._waiters.remove(waiter)
+                if waiter.done() and not waiter.cancelled():
+                    # Woken, then cancelled before it could run: pass the wakeup on
+                    self._wake()
+                raise
+            self._waiters.remove(waiter)
+        self.in_flight += 1
+        try:
+            now = time.monotonic()
+            start = max(now, self.paused_until)
+            if self.rate:
+                self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate) - 1
+                self._updated = now
+                if self.tokens < 0:
+                    start = max(start, now + -self.tokens / self.rate)
+            if start > now:
+                await asyncio.sleep(start - now)
+        except BaseException:
+            self._release_slot()
+            raise
+
+    def release(self, outcome, latency=None, retry_after=None):
+        """
+        Returns the slot and adapts the limits to how the call went.
+        """
+        self._release_slot()
+        now = time.monotonic()
+        if outcome == OK and latency is not None:
+            if self.samples >= MIN_SAMPLES and latency > SLOW_FACTOR * self.latency:
+                outcome = SLOW
+            self.latency = latency if self.latency is None else (1 - LATENCY_ALPHA) * self.latency + LATENCY_ALPHA * latency
+            self.samples += 1
+        self.counts[outcome] += 1
+
+        if outcome == OK:
+            # Additive increase: about one more slot per round of `limit` successes
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            if self.rate:
+                self.rate = min(self.max_rate, self.rate + RATE_STEP)
+        elif outcome in (SLOW, ERROR, THROTTLED):
+            if outcome == THROTTLED:
+                self.paused_until = max(self.paused_until, now + (THROTTLE_PAUSE if retry_after is None else retry_after))
+            # One multiplicative decrease per burst of failures from calls that were already in flight
+            if now - self._last_decrease >= (self.latency or 1.0):
+                self._last_decrease = now
+                factor = {THROTTLED: DECREASE_ON_THROTTLE, ERROR: DECREASE_ON_ERROR, SLOW: DECREASE_ON_SLOW}[outcome]
+                self.limit = max(1.0, self.limit * factor)
+                if self.rate:
+                    self.rate = max(self.min_rate, self.rate * factor)
+        self._wake()
+
+    def cancel(self):
+        # Returns the slot of a call that never ran to completion, without judging the target
+        self._release_slot()
+
+    def _release_slot(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        free = int(self.limit) - self.in_flight
+        for waiter in list(self._waiters)[:max(0, free)]:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def snapshot(self):
+        return {
+            "concurrency": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "rate": round(self.rate, 2) if self.rate else None,
+            "paused_s": round(max(0.0, self.paused_until - time.monotonic()), 1),
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            **self.counts,
+        }
+
+
+class RateController:
+    """
+    One TargetLimiter per target, created on first use from the settings
+    registered with configure() (host defaults otherwise). An optional pacer
+    (anything with an async wait(url), e.g. crawl.GlobalRateLimiter) is awaited
+    before every call as well.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._targets = {}
+        self._settings = {}
+        self.pacer = None
+
+    def configure(self, target, **settings):
+        with self._lock:
+            self._settings[target] = settings
+            self._targets.pop(target, None)
+
+    def target(self, target):
+        with self._lock:
+            limiter = self._targets.get(target)
+            if limiter is None:
+                limiter = self._targets[target] = TargetLimiter(target, **self._settings.get(target, {}))
+            return limiter
+
+    async def call(self, target, fn, retries=RETRIES, url=None):
+        """
+        Awaits fn() under the target's limits, retrying retryable failures
+        with jittered backoff. Raises the last error once retries run out.
+        """
+        limiter = self.target(target)
+        for attempt in range(retries + 1):
+            with metrics.span("rate_limit_wait"):
+                await limiter.acquire()
+                try:
+                    if self.pacer is not None:
+                        await self.pacer.wait(url or target)
+                except BaseException:
+                    limiter.cancel()
+                    raise
+            start = time.monotonic()
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                limiter.cancel()
+                raise
+            except Exception as e:
+                outcome, retry_after = classify(e)
+                limiter.release(outcome, retry_after=retry_after)
+                metrics.incr("rate_control", target=target, outcome=outcome)
+                if outcome == FATAL or attempt == retries:
+                    raise
+                delay = backoff_delay(attempt, retry_after)
+                print(f"{target}: {e!r}; retrying in {delay:.1f}s ({attempt + 1}/{retries})")
+                metrics.incr("rate_retry", target=target)
+                await asyncio.sleep(delay)
+                continue
+            limiter.release(OK, latency=time.monotonic() - start)
+            return result
+
+    def snapshot(self):
+        """
+        Returns {target: current limits and outcome counts} for the performance panel.
+        """
+        with self._lock:
+            targets = dict(self._targets)
+        return {name: limiter.snapshot() for name, limiter in sorted(targets.items())}
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_controller():
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = RateController()
+        return _controller
@@ -0,0 +1,112 @@
+import asyncio
+import os
+import time
+import metrics
+
+# Upper bound for any readiness wait; replaces the old fixed sleeps
+READY_TIMEOUT_MS = int(os.environ.get("LUSHA_READY_TIMEOUT_MS", "5000"))
+
+_WAIT_FIELDS = ("count", "mean_ms", "p50_ms", "p95_ms", "max_ms")
+
+
+def _record(label, signal, elapsed_ms):
+    metrics.observe("wait", elapsed_ms, label=label)
+    metrics.incr("wait_signal", label=label, signal=signal)
+
+
+def get_wait_stats():
+    """
+    Returns per-label wait timings from the metrics registry: count,
+    mean/p50/p95/max in ms and how often each signal (selector, networkidle,
+    change, timeout) ended the wait. Cleared by metrics.reset_metrics().
+    """
+    snapshot = metrics.get_metrics()
+    stats = {}
+    for key, span in snapshot["spans"].items():
+        name, tags = metrics.parse_key(key)
+        if name == "wait":
+            stats[tags["label"]] = dict({field: span[field] for field in _WAIT_FIELDS}, signals={})
+    for key, value in snapshot["counters"].items():
+        name, tags = metrics.parse_key(key)
+        if name == "wait_signal" and tags["label"] in stats:
+            stats[tags["label"]]["signals"][tags["signal"]] = value
+    return stats
+
+
+async def _first_success(named_tasks, timeout_ms):
+    # Returns the name of the first task that finishes without error, or "timeout"
+    pending = set(named_tasks)
+    deadline = time.perf_counter() + timeout_ms / 1000
+    try:
+        while pending:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() is None:
+                    return named_tasks[task]
+        return "timeout"
+    finally:
+        for task in pending:
+            task.cancel()
+        # Collect cancelled/failed tasks so asyncio doesn't warn about them
+        await asyncio.gather(*named_tasks, return_exceptions=True)
+
+
+async def wait_until_ready(page, selectors=(), label="page", network_idle=True, timeout_ms=None):
+    """
+    Waits until any of the selectors is attached or the network goes idle,
+    whichever comes first, capped at timeout_ms. Returns the signal that fired.
+    """
+    timeout_ms = timeout_ms or READY_TIMEOUT_MS
+    start = time.perf_counter()
+    named_tasks = {}
+    for selector in selectors:
+        task = asyncio.ensure_future(page.wait_for_selector(selector, state="attached", timeout=timeout_ms))
+        named_tasks[task] = "selector"
+    if network_idle:
+        task = asyncio.ensure_future(page.wait_for_load_state("networkidle", timeout=timeout_ms))
+        named_tasks[task] = "networkidle"
+
+    signal = await _first_success(named_tasks, timeout_ms) if named_tasks else "none"
+    _record(label, signal, (time.perf_counter() - start) * 1000)
+    return signal
+
+
+_CHANGE_JS = """
+([oldUrl, selector, oldText]) => {
+    if (location.href !== oldUrl) return true;
+    const el = document.querySelector(selector);
+    return !!el && el.innerText !== oldText;
+}
+"""
+
+
+async def snapshot_marker(page, selector):
+    """
+    Returns (url, text of first element matching selector) to detect changes later.
+    """
+    try:
+        text = await page.eval_on_selector(selector, "el => el.innerText")
+    except Exception:
+        text = None
+    return page.url, text
+
+
+async def wait_for_change(page, marker, selector, label="change", timeout_ms=None):
+    """
+    Waits until the URL differs from the marker's or the first element matching
+    selector has different text (e.g. after clicking a pagination link).
+    """
+    timeout_ms = timeout_ms or READY_TIMEOUT_MS
+    old_url, old_text = marker
+    start = time.perf_counter()
+    try:
+        await page.wait_for_function(_CHANGE_JS, arg=[old_url, selector, old_text], timeout=timeout_ms)
+        signal = "change"
+    except Exception as e:
+        # A navigation destroys the execution context mid-poll, which also means "changed"
+        signal = "change" if page.url != old_url or "context was destroyed" in str(e) else "timeout"
+    _record(label, signal, (time.perf_counter() - start) * 1000)
+    return signal
@@ -0,0 +1,113 @@
+import html
+import threading
+from collections import OrderedDict
+
+# Server-side view over a result set for app.py: card HTML is rendered once per
+# result-set version, and sorting/filtering/pagination work on row indices so a
+# rerun only joins the cards of the visible page.
+MAX_CACHED_VIEWS = 4
+
+SORTS = {
+    "score_desc": "Score (high to low)",
+    "score_asc": "Score (low to high)",
+    "name": "Name (A to Z)",
+    "listing": "Listing order",
+}
+
+
+def _has_website(company):
+    website = company.get('website_url')
+    return bool(website) and website != "N/A"
+
+
+def company_card_html(company):
+    is_analyzed = 'match_score' in company
+
+    if is_analyzed:
+        score = company.get('match_score', 0)
+        color = "green" if score > 70 else "orange" if score > 40 else "red"
+        score_text = f"{score}% Match"
+        reasoning_text = company.get('reasoning', 'No reasoning provided.')
+    else:
+        color = "gray"
+        score_text = "Analysis Pending"
+        reasoning_text = "Analysis pending (Check API Key/Profile)..."
+
+    def attr(value):
+        return html.escape(str(value), quote=True)
+
+    return f"""
+    <div class="company-card">
+        <div style="display:flex; justify-content:space-between;">
+            <h3>{html.escape(str(company.get('name', 'Unknown Company')))}</h3>
+            <h3 style="color:{color};">{score_text}</h3>
+        </div>
+        <p><strong>Website:</strong> <a href="{attr(company.get('website_url', company.get('url', '#')))}" target="_blank">Link</a> |
+           <strong>LinkedIn:</strong> <a href="{attr(company.get('linkedin', '#'))}" target="_blank">Profile</a> |
+           <span style="font-size:0.8em; color:gray;">(Lusha: <a href="{attr(company.get('url', '#'))}" target="_blank">Source</a>)</span></p>
+        <p><em>{html.escape(str(reasoning_text))}</em></p>
+    </div>
+    """
+
+
+class ResultView:
+    """
+    Precomputed cards and sort/filter keys for one version of a result set.
+    """
+    def __init__(self, results):
+        self.size = len(results)
+        self.cards = [company_card_html(c) for c in results]
+        self.names = [str(c.get('name') or "").lower() for c in results]
+        # Unscored companies sort after every scored one
+        self.scores = [c.get('match_score') if isinstance(c.get('match_score'), (int, float)) else None for c in results]
+        self.has_website = [_has_website(c) for c in results]
+
+    def query(self, sort="score_desc", min_score=0, name_contains="", website_only=False):
+        """
+        Returns the indices of matching rows in display order. A min_score
+        above 0 excludes companies that haven't been scored.
+        """
+        needle = name_contains.strip().lower()
+        indices = [
+            i for i in range(self.size)
+            if (not min_score or (self.scores[i] is not None and self.scores[i] >= min_score))
+            and (not needle or needle in self.names[i])
+            and (not website_only or self.has_website[i])
+        ]
+        if sort == "score_desc":
+            indices.sort(key=lambda i: (self.scores[i] is None, -(self.scores[i] or 0)))
+        elif sort == "score_asc":
+            indices.sort(key=lambda i: (self.scores[i] is None, self.scores[i] or 0))
+        elif sort == "name":
+            indices.sort(key=lambda i: self.names[i])
+        return indices
+
+    def page_html(self, indices, page, page_size):
+        start = (page - 1) * page_size
+        return "".join(self.cards[i] for i in indices[start:start + page_size])
+
+
+def page_count(total, page_size):
+    return max(1, -(-total // page_size))
+
+
+_views = OrderedDict()  # (version, row count) -> ResultView
+_views_lock = threading.Lock()
+
+
+def get_view(results, version):
+    """
+    Returns the ResultView for this result-set version, building it on first use.
+    """
+    key = (version, len(results))
+    with _views_lock:
+        view = _views.get(key)
+        if view is not None:
+            _views.move_to_end(key)
+            return view
+    view = ResultView(results)
+    with _views_lock:
+        _views[key] = view
+        while len(_views) > MAX_CACHED_VIEWS:
+            _views.popitem(last=False)
+    return view
@@ -0,0 +1,174 @@
+import os
+import threading
+import time
+from urllib.parse import urlparse
+import metrics
+
+# Request interception for browser contexts: aborts resources a scrape stage
+# doesn't need and records per-navigation bytes and load times.
+BLOCK_RESOURCES = os.environ.get("LUSHA_BLOCK_RESOURCES", "1") != "0"
+
+# Resource types each stage lets through; everything else is aborted. The
+# listing keeps stylesheets because link visibility depends on computed styles.
+STAGE_ALLOWED_TYPES = {
+    "directory": {"document", "script", "xhr", "fetch"},
+    "listing": {"document", "script", "xhr", "fetch", "stylesheet"},
+    "company": {"document", "script", "xhr", "fetch"},
+    "default": {"document", "script", "xhr", "fetch", "stylesheet", "other"},
+}
+
+# Analytics, ads and widgets that never affect the links we read
+BLOCKED_DOMAINS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googleadservices.com",
+    "googlesyndication.com", "facebook.net", "facebook.com", "connect.facebook.net",
+    "hotjar.com", "clarity.ms", "segment.io", "segment.com", "mixpanel.com", "hs-scripts.com",
+    "hs-analytics.net", "hubspot.com", "hsforms.net", "intercom.io", "intercomcdn.com", "drift.com",
+    "ads.linkedin.com", "snap.licdn.com", "bat.bing.com", "cookielaw.org", "onetrust.com",
+    "g2crowd.com", "zoominfo.com", "6sc.co", "bizible.com", "qualified.com", "vwo.com",
+)
+
+
+def is_blocked_domain(url):
+    host = urlparse(url).hostname or ""
+    return any(host == domain or host.endswith("." + domain) for domain in BLOCKED_DOMAINS)
+
+
+def should_block(resource_type, url, stage="default"):
+    if not BLOCK_RESOURCES:
+        return False
+    allowed = STAGE_ALLOWED_TYPES.get(stage, STAGE_ALLOWED_TYPES["default"])
+    return resource_type not in allowed or is_blocked_domain(url)
+
+
+class _Navigation:
+    def __init__(self, url, stage):
+        self.url = url
+        self.stage = stage
+        self.started = time.perf_counter()
+        self.dcl_ms = None
+        self.load_ms = None
+        self.bytes = 0
+        self.requests = 0
+        self.blocked = 0
+
+
+# Finished navigations, aggregated per (stage, blocking enabled)
+_traffic = {}
+_traffic_lock = threading.Lock()
+# page -> (stage, current _Navigation or None)
+_pages = {}
+
+
+def _record(nav):
+    if nav is None:
+        return
+    key = (nav.stage, BLOCK_RESOURCES)
+    if nav.load_ms is not None:
+        metrics.observe("page_load", nav.load_ms, stage=nav.stage)
+    metrics.incr("browser_bytes", nav.bytes, stage=nav.stage)
+    metrics.incr("browser_requests_blocked", nav.blocked, stage=nav.stage)
+    with _traffic_lock:
+        agg = _traffic.setdefault(key, {"pages": 0, "bytes": 0, "requests": 0, "blocked": 0,
+                                        "dcl_ms": 0.0, "dcl_count": 0, "load_ms": 0.0, "loaded": 0})
+        agg["pages"] += 1
+        agg["bytes"] += nav.bytes
+        agg["requests"] += nav.requests
+        agg["blocked"] += nav.blocked
+        if nav.dcl_ms is not None:
+            agg["dcl_ms"] += nav.dcl_ms
+            agg["dcl_count"] += 1
+        if nav.load_ms is not None:
+            agg["load_ms"] += nav.load_ms
+            agg["loaded"] += 1
+
+
+def get_traffic_stats():
+    """
+    Returns per-stage averages: KB transferred, requests, blocked requests,
+    DOMContentLoaded and load times per navigation, split by whether blocking
+    was enabled (run once with LUSHA_BLOCK_RESOURCES=0 for the baseline).
+    """
+    with _traffic_lock:
+        snapshot = {key: dict(agg) for key, agg in _traffic.items()}
+    stats = {}
+    for (stage, blocking), agg in snapshot.items():
+        pages = agg["pages"] or 1
+        stats[f"{stage} ({'blocking' if blocking else 'no blocking'})"] = {
+            "pages": agg["pages"],
+            "avg_kb": round(agg["bytes"] / pages / 1024, 1),
+            "avg_requests": round(agg["requests"] / pages, 1),
+            "avg_blocked": round(agg["blocked"] / pages, 1),
+            "avg_dcl_ms": round(agg["dcl_ms"] / agg["dcl_count"], 1) if agg["dcl_count"] else None,
+            "avg_load_ms": round(agg["load_ms"] / agg["loaded"], 1) if agg["loaded"] else None,
+        }
+    return stats
+
+
+def reset_traffic_stats():
+    with _traffic_lock:
+        _traffic.clear()
+
+
+async def install_routing(context):
+    """
+    Routes every request of the context through the stage-aware blocker.
+    """
+    async def handle(route, request):
+        try:
+            page = request.frame.page
+        except Exception:
+            page = None  # service worker requests have no frame
+        stage, nav = _pages.get(page, ("default", None))
+        if should_block(request.resource_type, request.url, stage):
+            if nav is not None:
+                nav.blocked += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await context.route("**/*", handle)
+
+
+def track_page(page, stage):
+    """
+    Starts collecting traffic stats for a pooled page used for `stage`.
+    """
+    _pages[page] = (stage, None)
+
+    def on_request(request):
+        # A main-frame document request starts a new navigation record
+        if request.resource_type == "document" and request.frame == page.main_frame:
+            _, previous = _pages.get(page, (stage, None))
+            _record(previous)
+            _pages[page] = (stage, _Navigation(request.url, stage))
+
+    async def on_request_finished(request):
+        _, nav = _pages.get(page, (stage, None))
+        if nav is None:
+            return
+        nav.requests += 1
+        try:
+            sizes = await request.sizes()
+            nav.bytes += sizes["responseBodySize"] + sizes["responseHeadersSize"]
+        except Exception:
+            pass
+
+    def on_dcl(_):
+        _, nav = _pages.get(page, (stage, None))
+        if nav is not None and nav.dcl_ms is None:
+            nav.dcl_ms = (time.perf_counter() - nav.started) * 1000
+
+    def on_load(_):
+        _, nav = _pages.get(page, (stage, None))
+        if nav is not None and nav.load_ms is None:
+            nav.load_ms = (time.perf_counter() - nav.started) * 1000
+
+    page.on("request", on_request)
+    page.on("requestfinished", on_request_finished)
+    page.on("domcontentloaded", on_dcl)
+    page.on("load", on_load)
+
+
+def untrack_page(page):
+    _, nav = _pages.pop(page, (None, None))
+    _record(nav)
@@ -1,176 +1,261 @@
 import asyncio
-from playwright.async_api import async_playwright
 import pandas as pd
-import random
-import sys
-import subprocess
+import os
+import metrics
+from async_loop import run_async, run_with_progress, iter_async
+from browser_pool import get_pool
+from routing import get_traffic_stats
+from extract import extract_links
+from http_fetch import fetch_links, record as record_fetch, BROWSER, get_fetch_stats
+from pagination import infer_page_url_template, page_url
+from link_classifier import BASE_URL, ListingParser, absolute_url, website_from_hero, website_from_page
+from cache import get_cache, STALE
+from checkpoint import open_checkpoint
+from readiness import wait_until_ready, wait_for_change, snapshot_marker, get_wait_stats
+from rate_control import get_controller, target_for, check_response
 
-# Generic async runner with Windows fix
-def run_async(coroutine):
-    if sys.platform == 'win32':
-        asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
-    return asyncio.run(coroutine)
+INDUSTRIES_URL = BASE_URL + "/company-search/"
 
-async def _launch_browser(p):
-    try:
-        return await p.chromium.launch(headless=True)
-    except Exception:
-        print("Browser launch failed, attempting to install browsers...")
-        subprocess.run(["playwright", "install", "chromium"])
-        return await p.chromium.launch(headless=True)
+# Listing pages fetched at once when paginating by URL
+PAGINATION_CONCURRENCY = int(os.environ.get("LUSHA_PAGINATION_CONCURRENCY", "3"))
+
+# Enrichment tuning
+ENRICH_CONCURRENCY = int(os.environ.get("LUSHA_ENRICH_CONCURRENCY", "4"))
+# Seconds per company, including the rate controller's retries
+ENRICH_TIMEOUT = float(os.environ.get("LUSHA_ENRICH_TIMEOUT", "90"))
+
+# Request pacing, concurrency and retries per host are handled by rate_control.py
+
+# Stale cache entries refreshed in the background at once; more are served stale
+# and refreshed on a later read
+MAX_REVALIDATIONS = int(os.environ.get("LUSHA_MAX_REVALIDATIONS", "4"))
+
+# Checkpointed listings larger than this aren't copied into the listing cache:
+# that would read the whole listing back into memory as one JSON blob
+LISTING_CACHE_MAX = int(os.environ.get("LUSHA_LISTING_CACHE_MAX", "2000"))
+
+def set_rate_limiter(limiter):
+    """
+    Makes every request in this process also wait on `limiter`, an object with
+    an async wait(url) method, e.g. one shared by every crawl worker (see
+    crawl.py). None removes it.
+    """
+    get_controller().pacer = limiter
+
+async def _goto(page, url, stage, timeout=60000):
+    # Browser navigation under the host's rate limits; 429s and 5xx responses are backed off and retried
+    async def navigate():
+        with metrics.span("navigate", stage=stage):
+            response = await page.goto(url, timeout=timeout, wait_until="domcontentloaded")
+        if response is not None:
+            check_response(response.status, response.headers)
+        return response
+
+    return await get_controller().call(target_for(url), navigate, url=url)
+
+async def _directory_links(url, label):
+    # Plain HTTP first; the browser is only used when the page needs it
+    fetched = await fetch_links(url, [".directory-content-box-col a"], stage=label)
+    if fetched:
+        return fetched["links"]
+    record_fetch(label, BROWSER)
+    async with get_pool().page(stage="directory") as page:
+        await _goto(page, url, label)
+        
+        # Wait for content to load
+        await wait_until_ready(page, [".directory-content-box-col a"], label=label)
+
+        # Selector based on user screenshot: directory-content-box-col -> a
+        # Fallback to "main a" if specific class not found
+        return await extract_links(page, [".directory-content-box-col a", "main a"])
 
 async def _get_industries():
     industries = []
-    async with async_playwright() as p:
-        browser = await _launch_browser(p)
-        page = await browser.new_page()
-        try:
-            # Navigate to generic search page
-            print("Navigating to Lusha directory...")
-            await page.goto("https://www.lusha.com/company-search/", timeout=60000)
-            
-            # Wait for content to load
-            await page.wait_for_timeout(3000)
+    try:
+        # Navigate to generic search page
+        print("Navigating to Lusha directory...")
+        links = await _directory_links(INDUSTRIES_URL, "directory")
 
-            # Selector based on user screenshot: directory-content-box-col -> a
-            elements = await page.locator(".directory-content-box-col a").all()
+        for link in links:
+            name, href = link["text"], link["href"]
             
-            # Fallback if specific class not found
-            if not elements:
-                 elements = await page.locator("main a").all()
+            if name and href and "/company-search/" in href:
+                href = absolute_url(href)
 
-            for el in elements:
-                name = await el.inner_text()
-                href = await el.get_attribute("href")
-                
-                if name and href and "/company-search/" in href:
-                    if href.startswith("/"):
-                        href = "https://www.lusha.com" + href
-                    
-                    # Clean name
-                    name = name.strip()
-                    if name:
-                        industries.append({"name": name, "url": href})
-            
-            # Remove duplicates
-            industries = [dict(t) for t in {tuple(d.items()) for d in industries}]
-            
-        except Exception as e:
-            print(f"Error fetching industries: {e}")
-        finally:
-            await browser.close()
+                # Clean name
+                name = name.strip()
+                if name:
+                    industries.append({"name": name, "url": href})
+        
+        # Remove duplicates
+        industries = [dict(t) for t in {tuple(d.items()) for d in industries}]
+        
+    except Exception as e:
+        print(f"Error fetching industries: {e}")
     return industries
 
 async def _get_countries(industry_url):
     countries = []
-    async with async_playwright() as p:
-        browser = await _launch_browser(p)
-        page = await browser.new_page()
-        try:
-            print(f"Fetching countries from {industry_url}...")
-            await page.goto(industry_url, timeout=60000)
-            await page.wait_for_timeout(3000)
-            
-            # Assuming similar structure for countries: directory-content-box-col -> a
-            elements = await page.locator(".directory-content-box-col a").all()
+    try:
+        print(f"Fetching countries from {industry_url}...")
+        # Assuming similar structure for countries: directory-content-box-col -> a
+        links = await _directory_links(industry_url, "industry")
+
+        for link in links:
+            name, href = link["text"], link["href"]
             
-             # Fallback
-            if not elements:
-                 elements = await page.locator("main a").all()
+            if name and href:
+                href = absolute_url(href)
 
-            for el in elements:
-                name = await el.inner_text()
-                href = await el.get_attribute("href")
-                
-                if name and href:
-                    if href.startswith("/"):
-                        href = "https://www.lusha.com" + href
-                    
-                    name = name.strip()
-                    if name and "/company-search/" in href:
-                        countries.append({"name": name, "url": href})
+                name = name.strip()
+                if name and "/company-search/" in href:
+                    countries.append({"name": name, "url": href})
 
-            # Remove duplicates
-            countries = [dict(t) for t in {tuple(d.items()) for d in countries}]
+        # Remove duplicates
+        countries = [dict(t) for t in {tuple(d.items()) for d in countries}]
 
-        except Exception as e:
-            print(f"Error fetching countries: {e}")
-        finally:
-            await browser.close()
+    except Exception as e:
+        print(f"Error fetching countries: {e}")
     return countries
 
-async def _scrape_companies(url, max_results=50):
-    results = []
-    async with async_playwright() as p:
-        browser = await _launch_browser(p)
-        page = await browser.new_page()
-        try:
+async def _load_listing_page(url):
+    # Fetches one listing page (over HTTP if possible, else on its own pooled page) and returns its links
+    fetched = await fetch_links(url, [".directory-content-box a"], stage="listing", container=".directory-content-box")
+    if fetched:
+        return fetched["links"]
+    record_fetch("listing", BROWSER)
+    async with get_pool().page(stage="listing") as page:
+        await _goto(page, url, "listing")
+        await wait_until_ready(page, [".directory-content-box a"], label="listing")
+        return await extract_links(page, [".directory-content-box a", "main a"])
+
+async def _list_pages_by_url(template, parser, per_page, first_page=2, on_page=None):
+    """
+    Fetches pages first_page..N directly from the inferred URL template, a
+    window of PAGINATION_CONCURRENCY pages at a time. Pages are parsed in order
+    (on_page(n) is called after each) and the crawl stops at the first page
+    without new companies. Returns complete.
+    """
+    page_num = first_page
+    while not parser.full:
+        remaining_pages = -(-(parser.max_results - parser.count) // max(per_page or 1, 1))
+        window = list(range(page_num, page_num + max(1, min(PAGINATION_CONCURRENCY, remaining_pages))))
+        print(f"Scraping pages {window[0]}-{window[-1]} by URL...")
+        with metrics.span("pagination_window"):
+            pages = await asyncio.gather(*(_load_listing_page(page_url(template, n)) for n in window), return_exceptions=True)
+        for n, links in zip(window, pages):
+            if isinstance(links, Exception):
+                raise links
+            new_companies = parser.add_page(links)
+            if on_page:
+                on_page(n)
+            print(f"Found {new_companies} new companies on page {n}. Total: {parser.count}")
+            if parser.full:
+                return False
+            if parser.exhausted(new_companies):
+                print("No new companies found on this page. Stopping.")
+                return True
+        page_num = window[-1] + 1
+    return False
+
+async def _list_companies(url, max_results=50, on_company=None, checkpoint=None):
+    """
+    Collects companies from a listing and its following pages. Returns
+    (results, complete) where complete tells whether the listing ran out before
+    max_results, or None if scraping failed part-way. on_company(company) is
+    called as soon as each company is parsed. With a checkpoint, companies are
+    not kept in `results` (they stream through on_company), progress is
+    recorded page by page and an interrupted listing resumes where it stopped.
+    """
+    parser = ListingParser(max_results, on_company, keep_results=checkpoint is None)
+    results = parser.results
+    complete = False
+    template = None
+    on_page = checkpoint.mark_page if checkpoint is not None else None
+    try:
+        if checkpoint is not None and checkpoint.resumed:
+            parser.seed(checkpoint.listed_urls)
+            if parser.full:
+                return results, False
+            state = checkpoint.state
+            if state["template"] and state["last_page"]:
+                print(f"Resuming listing at page {state['last_page'] + 1}: {state['template']}")
+                complete = await _list_pages_by_url(state["template"], parser, state["per_page"],
+                                                    first_page=state["last_page"] + 1, on_page=on_page)
+                return results, complete
+
+        # Page 1 over plain HTTP; if it parses and the page-URL pattern is known,
+        # the whole listing can be read without a browser
+        fetched = await fetch_links(url, [".directory-content-box a"], stage="listing", extra_selectors=["a"], container=".directory-content-box")
+        if fetched:
+            print(f"Scraping companies from {url} (HTTP)...")
+            new_companies = parser.add_page(fetched["links"])
+            if on_page:
+                on_page(1)
+            print(f"Found {new_companies} new companies on page 1. Total: {parser.count}")
+            if parser.full:
+                return results, False
+            if parser.exhausted(new_companies):
+                return results, True
+            template = infer_page_url_template(fetched["url"], fetched["extra"]["a"])
+            if template:
+                print(f"Paginating by URL: {template}")
+                per_page = new_companies + parser.replayed
+                if checkpoint is not None:
+                    checkpoint.set_pagination(template, per_page)
+                complete = await _list_pages_by_url(template, parser, per_page, on_page=on_page)
+                return results, complete
+        else:
+            record_fetch("listing", BROWSER)
+
+        async with get_pool().page(stage="listing") as page:
             print(f"Scraping companies from {url}...")
-            await page.goto(url, timeout=60000)
-            await page.wait_for_timeout(3000)
+            await _goto(page, url, "listing")
+            await wait_until_ready(page, [".directory-content-box a", "button#onetrust-accept-btn-handler"], label="listing")
             
             # Handle cookies
             try:
                 if await page.query_selector("button#onetrust-accept-btn-handler"):
                     await page.click("button#onetrust-accept-btn-handler")
-            except: pass
+            except Exception as e:
+                print(f"Could not dismiss the cookie banner: {e!r}")
 
             page_num = 1
-            while len(results) < max_results:
-                # Scrape companies on current page
-                print(f"Scraping page {page_num}...")
-                
-                # Wait for directory content
-                try:
-                     await page.wait_for_selector(".directory-content-box a", timeout=5000)
-                except: pass
+            while not parser.full:
+                if page_num == 1 and fetched:
+                    # Page 1 was already parsed over HTTP; the browser is only here to paginate
+                    new_companies_found_on_page = new_companies
+                else:
+                    # Scrape companies on current page
+                    print(f"Scraping page {page_num}...")
 
-                company_elements = await page.locator(".directory-content-box a").all()
-                if not company_elements:
-                     main = page.locator("main")
-                     if await main.count() > 0:
-                        company_elements = await main.locator("a").all()
+                    company_links = await extract_links(page, [".directory-content-box a", "main a"])
+                    new_companies_found_on_page = parser.add_page(company_links)
+                    if on_page:
+                        on_page(page_num)
 
-                results_seen = set() # Per page check, but global set is better for safety, though results list acts as unique enough if we check url
-                
-                new_companies_found_on_page = 0
-                for element in company_elements:
-                    try:
-                        if not await element.is_visible(): continue
-                        name = await element.inner_text()
-                        href = await element.get_attribute("href")
-                        
-                        if not name: continue
-                        name = name.strip()
-                        if len(name) < 2: continue
-                        
-                        # Filter keywords
-                        skip_keywords = ["Privacy Policy", "Terms of Use", "Start for free", "Login", "Sign Up", "About Us", "Contact", "Lusha", "Twitter", "Facebook", "LinkedIn", "Instagram"]
-                        if any(k.lower() == name.lower() for k in skip_keywords): continue
-                        
-                        if not href or "javascript" in href: continue
-                        if href.startswith("/"): href = "https://www.lusha.com" + href
-                        
-                        # Check if already in global results
-                        if any(r['url'] == href for r in results): continue
-
-                        results.append({"name": name, "url": href, "linkedin": "N/A"})
-                        new_companies_found_on_page += 1
-                        
-                        if len(results) >= max_results: break
-                    except: continue
-                
-                print(f"Found {new_companies_found_on_page} new companies on page {page_num}. Total: {len(results)}")
-                
-                if len(results) >= max_results:
-                    break
+                    print(f"Found {new_companies_found_on_page} new companies on page {page_num}. Total: {parser.count}")
 
-                if new_companies_found_on_page == 0:
-                     print("No new companies found on this page. Stopping.")
-                     break
+                    if parser.full:
+                        break
+
+                    if parser.exhausted(new_companies_found_on_page):
+                         print("No new companies found on this page. Stopping.")
+                         complete = True
+                         break
 
                 # Pagination Logic
-                # Try to find "Next" button or link
+                # Preferred: work out the page URL pattern once and fetch the rest directly
+                if page_num == 1:
+                    template = infer_page_url_template(page.url, await extract_links(page, "a"))
+                    if template:
+                        print(f"Paginating by URL: {template}")
+                        per_page = new_companies_found_on_page + parser.replayed
+                        if checkpoint is not None:
+                            checkpoint.set_pagination(template, per_page)
+                        break
+
+                # Fallback: click-through "Next" button or link
                 # Common patterns: text="Next", class="next", aria-label="Next page"
                 next_button = None
                 
@@ -186,73 +271,326 @@ async def _scrape_companies(url, max_results=50):
                         if await candidate.is_visible():
                             next_button = candidate
                             break
-                except: pass
+                except Exception as e:
+                    print(f"Error looking for the Next button: {e!r}")
                 
                 if next_button:
                     print("Clicking Next page...")
-                    await next_button.click()
-                    await page.wait_for_timeout(3000) # Wait for load
+                    with metrics.span("pagination_click"):
+                        marker = await snapshot_marker(page, ".directory-content-box a")
+                        await next_button.click()
+                        # Wait for the URL or the listing to change, then for the new links
+                        await wait_for_change(page, marker, ".directory-content-box a", label="pagination")
+                        await wait_until_ready(page, [".directory-content-box a"], label="listing")
                     page_num += 1
                 else:
                     print("No 'Next' button found. Stopping.")
+                    complete = True
                     break
+
+        # The first page is released before the remaining pages are fetched concurrently
+        if template and not parser.full:
+            complete = await _list_pages_by_url(template, parser, per_page, on_page=on_page)
                     
-        except Exception as e:
-            print(f"Error scraping companies: {e}")
-        
-        # Enrichment Phase
-        print(f"Enriching {len(results)} companies with website details...")
-        for i, company in enumerate(results):
-            try:
-                print(f"Enriching {i+1}/{len(results)}: {company['name']}")
-                await page.goto(company['url'], timeout=30000)
-                await page.wait_for_timeout(1500) 
-                
-                # Check for Website Link in Hero Section
-                # Based on user screenshot: class="company-hero-info" -> a tag
-                # Or generic search for 'Website' or external links
-                website_url = "N/A"
-                
-                # Method 1: Look for common website icon/text patterns
-                # The screenshot shows a link like www.123led.nl in the hero section
-                
-                hero_links = await page.locator(".company-hero-info a").all()
-                for link in hero_links:
-                    href = await link.get_attribute("href")
-                    if href and "lusha.com" not in href and "linkedin.com" not in href and "javascript" not in href:
-                        website_url = href
-                        break
-                
-                # Fallback: Look for any link with "www." or http that matches company name loosely
-                if website_url == "N/A":
-                    all_links = await page.locator("a").all()
-                    for link in all_links:
-                        href = await link.get_attribute("href")
-                        if href and ("http" in href or "www" in href):
-                             # Exclude internal/social
-                             if any(x in href.lower() for x in ["lusha.com", "linkedin", "twitter", "facebook", "instagram", "google", "maps"]):
-                                 continue
-                             # Heuristic: link text often contains "www" or matches name
-                             text = await link.inner_text()
-                             if "www" in text or "Website" in text:
-                                  website_url = href
-                                  break
-
-                company['website_url'] = website_url
-                
-            except Exception as e:
-                print(f"Error enriching {company['name']}: {e}")
-                company['website_url'] = "N/A"
+    except Exception as e:
+        print(f"Error scraping companies: {e}")
+        metrics.incr("scrape_error", stage="listing")
+        complete = None
+    return results, complete
+
+async def _fetch_listing(url, max_results):
+    with metrics.span("listing"):
+        results, complete = await _list_companies(url, max_results)
+    return {"companies": results, "complete": complete}
+
+def _listing_usable(listing, max_results):
+    # A cached listing can serve any request it has enough companies for
+    return listing["complete"] is not None and (listing["complete"] or len(listing["companies"]) >= max_results)
+
+async def _find_website(page, url):
+    await _goto(page, url, "company", timeout=30000)
+    await wait_until_ready(page, [".company-hero-info a"], label="company", timeout_ms=3000)
+    hero_links = await extract_links(page, ".company-hero-info a")
+    return await _website_from_links(hero_links, lambda: extract_links(page, "a"))
+
+async def _find_website_http(url):
+    # Returns the website, or None if the company page has to be rendered in the browser
+    fetched = await fetch_links(url, [".company-hero-info a"], stage="company", extra_selectors=["a"])
+    if fetched is None:
+        return None
+
+    async def all_links():
+        return fetched["extra"]["a"]
+
+    return await _website_from_links(fetched["links"], all_links)
+
+async def _website_from_links(hero_links, get_all_links):
+    # Check for Website Link in Hero Section
+    # Based on user screenshot: class="company-hero-info" -> a tag
+    # The screenshot shows a link like www.123led.nl in the hero section
+    website_url = website_from_hero(hero_links)
+
+    # Fallback: Look for any link with "www." or http that matches company name loosely
+    if website_url is None:
+        website_url = website_from_page(await get_all_links())
+
+    return website_url or "N/A"
+
+async def _lookup_website(url):
+    website_url = await _find_website_http(url)
+    if website_url is not None:
+        return website_url
+    record_fetch("company", BROWSER)
+    # Borrowed per company, not per worker: workers holding pages between companies
+    # would leave no slot for the listing pages they are waiting on
+    async with get_pool().page(stage="company") as page:
+        return await _find_website(page, url)
+
+async def _enrich_company(company):
+    # Each request is paced and retried by the rate controller; the whole lookup
+    # is capped by a per-company timeout. Returns None if the lookup failed.
+    try:
+        with metrics.span("enrich"):
+            return await asyncio.wait_for(_lookup_website(company['url']), ENRICH_TIMEOUT)
+    except Exception as e:
+        print(f"Error enriching {company['name']}: {e!r}")
+        metrics.incr("scrape_error", stage="enrich")
+        return None
 
-        await browser.close()
+async def _refetch_enrichment(company):
+    website_url = await _enrich_company(company)
+    return {"website_url": website_url} if website_url is not None else None
+
+async def _iter_companies(url, max_results=50, concurrency=None, force_refresh=False, resume=False):
+    """
+    Async generator that yields ("listed", company) as soon as a company is
+    parsed from the listing and ("enriched", company) once its website has been
+    looked up, plus a single ("listing_done", count) when the listing is
+    exhausted. Listing and enrichment run concurrently; enrichment uses up to
+    `concurrency` pages. The same dict is yielded for both company events.
+
+    With resume=True progress is checkpointed to disk (see checkpoint.py): a
+    scrape of the same URL and size that was interrupted replays what it had
+    and continues from there. The checkpoint is deleted once the scrape
+    finishes; force_refresh=True starts over.
+    """
+    cache = get_cache()
+    events = asyncio.Queue()
+    to_enrich = asyncio.Queue()
+    workers = max(1, min(concurrency or ENRICH_CONCURRENCY, max_results))
+    listed = 0
+    listing_failed = False
+    # Same key as the job runner's dedup key; a forced scrape must not discard a normal one's progress
+    checkpoint = open_checkpoint(("scrape", url, max_results, bool(force_refresh))) if resume else None
+    if resume and checkpoint is None:
+        print(f"Another scrape of {url} holds its checkpoint; running without one")
+    if checkpoint is not None and force_refresh:
+        checkpoint.discard()
+
+    def on_listed(company, replayed=False):
+        nonlocal listed
+        if listed >= max_results:
+            return
+        if checkpoint is not None and not replayed and not checkpoint.add_listed(company):
+            return  # already replayed from the checkpoint
+        listed += 1
+        company = dict(company)
+        events.put_nowait(("listed", company))
+        to_enrich.put_nowait(company)
+
+    async def produce():
+        nonlocal listing_failed
+        try:
+            if checkpoint is not None and checkpoint.resumed:
+                print(f"Resuming scrape of {url}: {checkpoint.listed} companies listed, {len(checkpoint.enriched)} enriched")
+                metrics.incr("checkpoint_resumed")
+                for company in checkpoint.iter_listed():
+                    on_listed(company, replayed=True)
+                if checkpoint.state["listing_complete"] is not None:
+                    return
+            listing, state = (None, None) if force_refresh else cache.get("listings", url)
+            if state is not None and _listing_usable(listing, max_results):
+                if state == STALE:
+                    # Refetch at least as many companies as the entry has, so a smaller search doesn't shrink it
+                    size = max(max_results, len(listing["companies"]))
+                    _revalidate("listings", url, lambda: _fetch_listing(url, size),
+                                lambda value: _listing_usable(value, size))
+                for company in listing["companies"]:
+                    on_listed(company)
+                if checkpoint is not None:
+                    checkpoint.finish_listing(listing["complete"])
+            else:
+                with metrics.span("listing"):
+                    results, complete = await _list_companies(url, max_results, on_company=on_listed, checkpoint=checkpoint)
+                listing_failed = complete is None
+                if checkpoint is not None:
+                    # Streamed to disk instead of held in results; small listings are read back once for the cache
+                    if complete is not None:
+                        checkpoint.finish_listing(complete)
+                    if complete is None or checkpoint.listed > LISTING_CACHE_MAX:
+                        return
+                    results = list(checkpoint.iter_listed())
+                listing = {"companies": results, "complete": complete}
+                if _listing_usable(listing, max_results):
+                    cache.set("listings", url, listing)
+        finally:
+            events.put_nowait(("listing_done", listed))
+            for _ in range(workers):
+                to_enrich.put_nowait(None)
+
+    async def enrich():
+        try:
+            await enrich_companies()
+        finally:
+            # Posted even if the worker fails, so the consumer never waits on a dead worker
+            events.put_nowait(("_worker_done", None))
+
+    async def enrich_companies():
+        while True:
+            company = await to_enrich.get()
+            if company is None:
+                break
+            if checkpoint is not None and company['url'] in checkpoint.enriched:
+                company['website_url'] = checkpoint.enriched[company['url']]
+                events.put_nowait(("enriched", company))
+                continue
+            cached, state = (None, None) if force_refresh else cache.get("enrichment", company['url'])
+            if state is not None:
+                website_url = cached['website_url']
+                if state == STALE:
+                    _revalidate("enrichment", company['url'], lambda company=dict(company): _refetch_enrichment(company),
+                                lambda value: value is not None)
+            else:
+                website_url = await _enrich_company(company)
+                if website_url is not None:
+                    cache.set("enrichment", company['url'], {"website_url": website_url})
+            if website_url is not None and checkpoint is not None:
+                checkpoint.add_enriched(company['url'], website_url)
+            company['website_url'] = website_url or "N/A"
+            events.put_nowait(("enriched", company))
+
+    tasks = [asyncio.ensure_future(produce())] + [asyncio.ensure_future(enrich()) for _ in range(workers)]
+    running = set(tasks)
+    getter = None
+    finished_ok = False
+    try:
+        finished = 0
+        while finished < workers:
+            # Wait for the next event or for a task to end, so a failed task raises here
+            if getter is None:
+                getter = asyncio.ensure_future(events.get())
+            done, _ = await asyncio.wait(running | {getter}, return_when=asyncio.FIRST_COMPLETED)
+            for task in done - {getter}:
+                running.discard(task)
+                if not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
+            if getter not in done:
+                continue
+            kind, company = getter.result()
+            getter = None
+            if kind == "_worker_done":
+                finished += 1
+                continue
+            yield kind, company
+        await asyncio.gather(*tasks)
+        finished_ok = True
+    finally:
+        if getter is not None:
+            getter.cancel()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if checkpoint is not None:
+            # Kept for the next attempt unless the whole scrape went through
+            if finished_ok and not listing_failed:
+                checkpoint.discard()
+            checkpoint.close()
+
+async def _scrape_companies(url, max_results=50, concurrency=None, progress_callback=None, force_refresh=False, resume=False):
+    results = []
+    enriched = 0
+    total = max_results  # until the listing is exhausted
+    with metrics.span("scrape"):
+        async for kind, item in _iter_companies(url, max_results, concurrency=concurrency, force_refresh=force_refresh, resume=resume):
+            if kind == "listed":
+                results.append(item)
+            elif kind == "listing_done":
+                total = item
+            elif kind == "enriched":
+                enriched += 1
+                print(f"Enriched {enriched}/{total}: {item['name']}")
+                if progress_callback:
+                    progress_callback(enriched, total, item)
     return results
 
+# Cache helpers
+_revalidating = set()
+_revalidate_tasks = set()  # strong references, so refreshes aren't garbage-collected mid-run
+
+def _revalidate(kind, key, fetch, usable):
+    # Stale-while-revalidate: refresh an entry in the background, once at a time
+    if (kind, key) in _revalidating or len(_revalidating) >= MAX_REVALIDATIONS:
+        return
+    _revalidating.add((kind, key))
+
+    async def refresh():
+        try:
+            value = await fetch()
+            if usable(value):
+                get_cache().set(kind, key, value)
+        except Exception as e:
+            print(f"Error revalidating {kind} {key}: {e}")
+        finally:
+            _revalidating.discard((kind, key))
+
+    task = asyncio.ensure_future(refresh())
+    _revalidate_tasks.add(task)
+    task.add_done_callback(_revalidate_tasks.discard)
+
+async def _cached(kind, key, fetch, force_refresh=False, usable=bool):
+    """
+    Returns the cached value for (kind, key) if usable, otherwise awaits fetch()
+    and stores its result. Stale entries are returned immediately and refreshed
+    in the background. Results rejected by usable() (e.g. empty lists from a
+    failed scrape) are never stored.
+    """
+    if not force_refresh:
+        value, state = get_cache().get(kind, key)
+        if state is not None and usable(value):
+            if state == STALE:
+                _revalidate(kind, key, fetch, usable)
+            return value
+    value = await fetch()
+    if usable(value):
+        get_cache().set(kind, key, value)
+    return value
+
 # Synchronous Wrappers
-def get_industries():
-    return run_async(_get_industries())
+def get_industries(force_refresh=False):
+    return run_async(_cached("industries", INDUSTRIES_URL, _get_industries, force_refresh=force_refresh))
+
+def get_countries(industry_url, force_refresh=False):
+    return run_async(_cached("countries", industry_url, lambda: _get_countries(industry_url), force_refresh=force_refresh))
 
-def get_countries(industry_url):
-    return run_async(_get_countries(industry_url))
+def iter_companies(url, max_results=50, concurrency=None, force_refresh=False, resume=False):
+    """
+    Synchronous generator over the streaming scrape: yields ("listed", company)
+    and later ("enriched", company) for each company as soon as it is ready,
+    and ("listing_done", count) once the listing is exhausted. resume=True
+    checkpoints progress to disk and continues an interrupted scrape.
+    """
+    return iter_async(lambda: _iter_companies(url, max_results, concurrency=concurrency, force_refresh=force_refresh, resume=resume))
 
-def scrape_companies(url, max_results=50):
-    return run_async(_scrape_companies(url, max_results))
+def scrape_companies(url, max_results=50, progress_callback=None, concurrency=None, force_refresh=False, resume=False):
+    """
+    Scrapes up to max_results companies from a listing URL and enriches them.
+    progress_callback(done, total, company) is called on the caller's thread
+    as each company finishes enrichment. Listings and enrichment results are
+    cached on disk; force_refresh=True bypasses the cache. resume=True
+    checkpoints progress so a failed or interrupted call can be repeated
+    without starting over.
+    """
+    return run_with_progress(
+        lambda report: _scrape_companies(url, max_results, concurrency=concurrency, progress_callback=report, force_refresh=force_refresh, resume=resume),
+        progress_callback,
+    )
@@ -0,0 +1,51 @@
+import os
+import pytest
+import checkpoint as checkpoint_module
+from checkpoint import open_checkpoint
+
+KEY = ("scrape", "https://www.lusha.com/company-search/software/germany/", 100, False)
+
+
+def company(n):
+    return {"name": f"Company {n}", "url": f"https://www.lusha.com/company-search/company/c{n}/"}
+
+
+def test_progress_survives_reopening(tmp_path):
+    first = open_checkpoint(KEY, tmp_path)
+    first.add_listed(company(1))
+    first.add_enriched(company(1)["url"], "https://c1.example")
+    first.mark_page(1)
+    first.close()
+
+    second = open_checkpoint(KEY, tmp_path)
+    assert second.resumed
+    assert [c["url"] for c in second.iter_listed()] == [company(1)["url"]]
+    assert second.enriched == {company(1)["url"]: "https://c1.example"}
+    second.close()
+
+
+@pytest.mark.skipif(checkpoint_module.fcntl is None, reason="no advisory locks on this platform")
+def test_one_scrape_per_checkpoint(tmp_path):
+    held = open_checkpoint(KEY, tmp_path)
+    assert open_checkpoint(KEY, tmp_path) is None
+    # A forced scrape of the same listing has its own checkpoint
+    forced = open_checkpoint(KEY[:3] + (True,), tmp_path)
+    assert forced is not None
+    forced.close()
+    # Discarding keeps the lock until close()
+    held.discard()
+    assert open_checkpoint(KEY, tmp_path) is None
+    held.close()
+    reopened = open_checkpoint(KEY, tmp_path)
+    assert reopened is not None and not reopened.resumed
+    reopened.close()
+
+
+def test_purge_removes_abandoned_checkpoints_and_locks(tmp_path):
+    old = open_checkpoint(KEY, tmp_path)
+    old.add_listed(company(1))
+    old.close()
+    for name in os.listdir(tmp_path):
+        os.utime(tmp_path / name, (0, 0))
+    checkpoint_module.purge_checkpoints(tmp_path)
+    assert os.listdir(tmp_path) == []
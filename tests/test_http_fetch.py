@@ -0,0 +1,186 @@
+import asyncio
+from pathlib import Path
+import httpx
+import pytest
+import http_fetch
+import rate_control
+from http_fetch import fetch_links, is_challenge, parse_links
+
+FIXTURES = Path(__file__).parent / "fixtures"
+BASE = "https://www.lusha.com"
+
+
+def fixture(name):
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+# parse_links
+
+
+def test_parse_links_directory():
+    links = parse_links(fixture("directory.html"), [".directory-content-box-col a"])
+    assert [(l["text"], l["href"]) for l in links] == [
+        ("Software", "/company-search/software/"),
+        ("Retail", "/company-search/retail/"),
+        ("Health Care", "/company-search/health-care/"),
+        ("Legacy", "/company-search/legacy/"),
+    ]
+    assert [l["visible"] for l in links] == [True, True, True, False]
+
+
+def test_parse_links_listing_marks_hidden_ancestors():
+    links = parse_links(fixture("listing.html"), [".directory-content-box a"])
+    assert [l["text"] for l in links] == ["Acme GmbH", "Beta Software", "Ghost Ltd", "Gamma AG"]
+    assert [l["text"] for l in links if not l["visible"]] == ["Ghost Ltd"]
+
+
+def test_parse_links_uses_first_selector_that_matches():
+    links = parse_links(fixture("company.html"), [".missing a", ".company-hero-info a", "a"])
+    assert [l["href"] for l in links] == ["https://www.linkedin.com/company/acme-gmbh", "https://www.acme.de"]
+
+
+def test_parse_links_selector_string_and_no_match():
+    assert len(parse_links(fixture("listing.html"), "main a")) == 8
+    assert parse_links(fixture("company_scripted.html"), [".company-hero-info a"]) == []
+    assert parse_links("", ["a"]) == []
+    assert parse_links("   ", ["a"]) == []
+
+
+# is_challenge
+
+
+def test_is_challenge_detects_challenge_page():
+    assert is_challenge(200, fixture("challenge.html"))
+
+
+@pytest.mark.parametrize("status", [401, 403, 429, 503])
+def test_is_challenge_by_status(status):
+    assert is_challenge(status, "<html></html>")
+
+
+@pytest.mark.parametrize("name", ["directory.html", "listing.html", "listing_end.html", "company.html"])
+def test_is_challenge_ignores_ordinary_pages(name):
+    assert not is_challenge(200, fixture(name))
+
+
+def test_is_challenge_ignores_embedded_recaptcha():
+    assert not is_challenge(200, '<html><body><form><div class="g-recaptcha"></div></form></body></html>')
+
+
+# fetch_links over a mock transport
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """
+    serve({path: (status, fixture name or html[, headers])}) routes the shared
+    client to those responses; unknown paths get a 404. Returns the request log.
+    """
+    requests = []
+
+    def install(routes):
+        def handler(request):
+            requests.append(request.url.path)
+            status, body, *rest = routes.get(request.url.path, (404, "<html>Not found</html>"))
+            if body.endswith(".html"):
+                body = fixture(body)
+            return httpx.Response(status, text=body, headers=rest[0] if rest else None)
+
+        monkeypatch.setattr(http_fetch, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        return requests
+
+    # No pacing or backoff sleeps in tests
+    controller = rate_control.RateController()
+    controller.configure("www.lusha.com", rate=0)
+    monkeypatch.setattr(http_fetch, "get_controller", lambda: controller)
+    monkeypatch.setattr(rate_control, "BACKOFF", 0.0)
+    return install
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_fetch_links_directory(serve):
+    serve({"/company-search/": (200, "directory.html")})
+    fetched = run(fetch_links(BASE + "/company-search/", [".directory-content-box-col a"], stage="directory"))
+    assert fetched["url"] == BASE + "/company-search/"
+    assert len(fetched["links"]) == 4
+    assert fetched["extra"] == {}
+
+
+def test_fetch_links_extra_selectors(serve):
+    serve({"/company-search/software/germany/": (200, "listing.html")})
+    fetched = run(fetch_links(BASE + "/company-search/software/germany/", [".directory-content-box a"],
+                              stage="listing", extra_selectors=["a"], container=".directory-content-box"))
+    assert [l["text"] for l in fetched["links"]][:2] == ["Acme GmbH", "Beta Software"]
+    assert "Next" in [l["text"] for l in fetched["extra"]["a"]]
+
+
+def test_fetch_links_empty_container_is_end_of_listing(serve):
+    serve({"/company-search/software/germany/": (200, "listing_end.html")})
+    fetched = run(fetch_links(BASE + "/company-search/software/germany/", [".directory-content-box a"],
+                              stage="listing", container=".directory-content-box"))
+    assert fetched is not None
+    assert fetched["links"] == []
+
+
+def test_fetch_links_missing_selector_without_container_falls_back(serve):
+    serve({"/company-search/software/germany/": (200, "listing_end.html")})
+    assert run(fetch_links(BASE + "/company-search/software/germany/", [".directory-content-box a"],
+                           stage="listing")) is None
+
+
+def test_fetch_links_company(serve):
+    serve({"/company-search/company/acme-gmbh/": (200, "company.html")})
+    fetched = run(fetch_links(BASE + "/company-search/company/acme-gmbh/", [".company-hero-info a"],
+                              stage="company", extra_selectors=["a"]))
+    assert fetched["links"][1]["href"] == "https://www.acme.de"
+
+
+@pytest.mark.parametrize("route, outcome", [
+    ((200, "company_scripted.html"), http_fetch.HTTP_MISSING),   # hero rendered by script
+    ((200, "challenge.html"), http_fetch.HTTP_CHALLENGE),         # bot challenge served with 200
+    ((403, "challenge.html"), http_fetch.HTTP_CHALLENGE),
+    ((503, "challenge.html"), http_fetch.HTTP_CHALLENGE),         # 503 without Retry-After
+    ((404, "<html>Not found</html>"), http_fetch.HTTP_ERROR),
+    ((500, "<html>Oops</html>"), http_fetch.HTTP_ERROR),          # retried, then given up
+])
+def test_fetch_links_falls_back_to_browser(serve, route, outcome):
+    http_fetch.reset_fetch_stats()
+    serve({"/company-search/company/beta/": route})
+    assert run(fetch_links(BASE + "/company-search/company/beta/", [".company-hero-info a"], stage="company")) is None
+    assert http_fetch.get_fetch_stats()["company"][outcome] == 1
+
+
+def test_fetch_links_retries_throttled_requests(serve):
+    responses = iter([(429, "<html>Slow down</html>", {"Retry-After": "0"}), (200, "company.html")])
+
+    class OneAfterAnother(dict):
+        def get(self, path, default=None):
+            return next(responses)
+
+    requests = serve(OneAfterAnother())
+    fetched = run(fetch_links(BASE + "/company-search/company/acme-gmbh/", [".company-hero-info a"], stage="company"))
+    assert len(requests) == 2
+    assert fetched["links"][1]["href"] == "https://www.acme.de"
+
+
+def test_fetch_links_raises_when_still_throttled(serve):
+    # The browser would hit the same throttling host, so the caller gets the error instead
+    http_fetch.reset_fetch_stats()
+    requests = serve({"/company-search/company/beta/": (429, "<html>Slow down</html>", {"Retry-After": "0"})})
+    with pytest.raises(rate_control.Throttled):
+        run(fetch_links(BASE + "/company-search/company/beta/", [".company-hero-info a"], stage="company"))
+    assert len(requests) == rate_control.RETRIES + 1
+    assert http_fetch.get_fetch_stats()["company"][http_fetch.HTTP_THROTTLED] == 1
+
+
+def test_fetch_links_connection_error_falls_back(monkeypatch, serve):
+    serve({})
+
+    def handler(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    monkeypatch.setattr(http_fetch, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    assert run(fetch_links(BASE + "/company-search/", ["a"], stage="directory")) is None
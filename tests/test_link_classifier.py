@@ -0,0 +1,136 @@
+import pytest
+from link_classifier import (
+    ListingParser, classify_company_link, normalize_url, website_from_hero, website_from_page,
+)
+
+BASE = "https://www.lusha.com"
+
+
+def link(text, href, visible=True):
+    return {"text": text, "href": href, "visible": visible}
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTPS://WWW.Lusha.com/company-search/acme/", "https://www.lusha.com/company-search/acme"),
+    ("https://www.lusha.com/company-search/acme#top", "https://www.lusha.com/company-search/acme"),
+    ("  https://www.lusha.com/a/?page=2  ", "https://www.lusha.com/a?page=2"),
+    ("https://www.lusha.com", "https://www.lusha.com/"),
+    ("https://www.lusha.com/", "https://www.lusha.com/"),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_normalize_url_keeps_path_case():
+    assert normalize_url("https://example.com/Acme") != normalize_url("https://example.com/acme")
+
+
+def test_classify_company_link_makes_relative_hrefs_absolute():
+    company = classify_company_link(link("  Acme Corp ", "/company-search/company/acme/"), BASE)
+    assert company == {"name": "Acme Corp", "url": BASE + "/company-search/company/acme/"}
+
+
+def test_classify_company_link_keeps_absolute_hrefs():
+    company = classify_company_link(link("Acme", "https://other.example/acme"), BASE)
+    assert company["url"] == "https://other.example/acme"
+
+
+@pytest.mark.parametrize("text", ["Privacy Policy", "login", "SIGN UP", "Lusha", "LinkedIn", " Contact "])
+def test_classify_company_link_skips_site_chrome(text):
+    assert classify_company_link(link(text, "/somewhere/"), BASE) is None
+
+
+@pytest.mark.parametrize("bad", [
+    link("Acme", "javascript:void(0)"),
+    link("Acme", None),
+    link("Acme", ""),
+    link("Acme", "/company-search/company/acme/", visible=False),
+    link("A", "/company-search/company/a/"),
+    link("  ", "/company-search/company/blank/"),
+    link(None, "/company-search/company/none/"),
+])
+def test_classify_company_link_rejects(bad):
+    assert classify_company_link(bad, BASE) is None
+
+
+def test_classify_company_link_treats_missing_visibility_as_visible():
+    assert classify_company_link({"text": "Acme", "href": "/acme/"}, BASE) is not None
+
+
+def test_listing_parser_dedups_across_pages_and_fragments():
+    found = []
+    parser = ListingParser(10, on_company=found.append, base_url=BASE)
+    assert parser.add_page([link("Acme", "/c/acme/"), link("Acme", "/c/acme#top"), link("Beta", "/c/beta/")]) == 2
+    assert parser.add_page([link("Beta", "/c/beta"), link("Gamma", "/c/gamma/")]) == 1
+    assert [c["name"] for c in parser.results] == ["Acme", "Beta", "Gamma"]
+    assert found == parser.results
+    assert all(c["linkedin"] == "N/A" for c in parser.results)
+    assert parser.count == 3
+
+
+def test_listing_parser_stops_at_max_results():
+    parser = ListingParser(2, base_url=BASE)
+    assert parser.add_page([link(f"Co {i}", f"/c/{i}/") for i in range(5)]) == 2
+    assert parser.full
+    assert parser.add_page([link("Late", "/c/late/")]) == 0
+    assert len(parser.results) == 2
+
+
+def test_listing_parser_without_keep_results_only_counts():
+    found = []
+    parser = ListingParser(5, on_company=found.append, base_url=BASE, keep_results=False)
+    parser.add_page([link("Acme", "/c/acme/"), link("Beta", "/c/beta/")])
+    assert parser.results == []
+    assert parser.count == 2
+    assert len(found) == 2
+
+
+def test_listing_parser_seed_counts_towards_max_and_skips_replays():
+    parser = ListingParser(3, base_url=BASE)
+    parser.seed([BASE + "/c/acme/", BASE + "/c/beta", BASE + "/c/acme"])
+    assert parser.count == 2
+    added = parser.add_page([link("Acme", "/c/acme/"), link("Beta", "/c/beta/"), link("Gamma", "/c/gamma/")])
+    assert added == 1
+    assert parser.replayed == 2
+    assert [c["name"] for c in parser.results] == ["Gamma"]
+    assert parser.full
+
+
+def test_listing_parser_exhausted():
+    parser = ListingParser(10, base_url=BASE)
+    parser.seed([BASE + "/c/acme/"])
+    # A page that only repeats seeded companies doesn't end a resumed listing
+    added = parser.add_page([link("Acme", "/c/acme/")])
+    assert added == 0 and not parser.exhausted(added)
+    # A page with nothing new at all does
+    added = parser.add_page([link("Privacy Policy", "/privacy/")])
+    assert parser.exhausted(added)
+    added = parser.add_page([link("Beta", "/c/beta/")])
+    assert not parser.exhausted(added)
+
+
+def test_website_from_hero_skips_lusha_linkedin_and_javascript():
+    hero = [
+        link("Lusha", "https://www.lusha.com/company-search/"),
+        link("LinkedIn", "https://www.linkedin.com/company/acme"),
+        link("", "javascript:void(0)"),
+        link("", None),
+        link("www.acme.com", "https://www.acme.com"),
+        link("other", "https://other.example"),
+    ]
+    assert website_from_hero(hero) == "https://www.acme.com"
+    assert website_from_hero(hero[:4]) is None
+    assert website_from_hero([]) is None
+
+
+def test_website_from_page_needs_website_like_text():
+    links = [
+        link("Home", "/"),
+        link("Twitter", "https://twitter.com/acme"),
+        link("www.facebook.com/acme", "https://facebook.com/acme"),
+        link("Docs", "https://docs.acme.com"),
+        link("Visit Website", "https://www.acme.com"),
+    ]
+    assert website_from_page(links) == "https://www.acme.com"
+    assert website_from_page(links[:4]) is None
+    assert website_from_page([link("www.beta.io", "www.beta.io")]) == "www.beta.io"
@@ -0,0 +1,67 @@
+import pytest
+from pagination import _template_from, infer_page_url_template, page_url
+
+LISTING = "https://www.lusha.com/company-search/software/germany/"
+
+
+def link(text, href):
+    return {"text": text, "href": href, "visible": True}
+
+
+@pytest.mark.parametrize("page, candidate, expected", [
+    # Query parameter
+    (LISTING, LISTING + "?page=2", LISTING + "?page={page}"),
+    (LISTING + "?page=1", LISTING + "?page=2", LISTING + "?page={page}"),
+    (LISTING + "?sort=name", LISTING + "?sort=name&p=2", LISTING + "?sort=name&p={page}"),
+    ("https://www.lusha.com/list", "https://www.lusha.com/list/?page=2", "https://www.lusha.com/list/?page={page}"),
+    # Path segment
+    (LISTING, LISTING + "2/", LISTING + "{page}/"),
+    ("https://www.lusha.com/list", "https://www.lusha.com/list/2", "https://www.lusha.com/list/{page}"),
+    (LISTING, LISTING + "page/2/", LISTING + "page/{page}/"),
+    ("https://www.lusha.com/list", "https://www.lusha.com/list/page/2", "https://www.lusha.com/list/page/{page}"),
+    # Page 1 addressed explicitly
+    (LISTING + "1/", LISTING + "2/", LISTING + "{page}/"),
+])
+def test_template_from(page, candidate, expected):
+    assert _template_from(page, candidate) == expected
+
+
+@pytest.mark.parametrize("candidate", [
+    "https://other.example/company-search/software/germany/?page=2",  # other host
+    "http://www.lusha.com/company-search/software/germany/?page=2",   # other scheme
+    LISTING + "?page=2&sort=name",                                    # other parameters changed
+    LISTING + "?page=3",                                              # not page 2
+    "https://www.lusha.com/company-search/retail/?page=2",            # other path
+    LISTING + "acme/",                                                # a company, not a page
+])
+def test_template_from_rejects(candidate):
+    assert _template_from(LISTING, candidate) is None
+
+
+def test_infer_from_page_number_link():
+    links = [link("1", "?page=1"), link("2", "?page=2"), link("3", "?page=3")]
+    assert infer_page_url_template(LISTING, links) == LISTING + "?page={page}"
+
+
+@pytest.mark.parametrize("text", ["Next", " next ", "›", "»", ">"])
+def test_infer_from_next_link(text):
+    assert infer_page_url_template(LISTING, [link(text, "page/2/")]) == LISTING + "page/{page}/"
+
+
+@pytest.mark.parametrize("text", ["Nextiva", "> Read more", "Next steps", "Previous"])
+def test_infer_ignores_other_link_texts(text):
+    assert infer_page_url_template(LISTING, [link(text, LISTING + "?page=2")]) is None
+
+
+def test_infer_skips_unusable_hrefs():
+    links = [link("Next", "javascript:void(0)"), link("2", "#"), link("2", None), link("Next", LISTING + "2/")]
+    assert infer_page_url_template(LISTING, links) == LISTING + "{page}/"
+
+
+def test_infer_without_pagination():
+    assert infer_page_url_template(LISTING, [link("Acme GmbH", "/company-search/company/acme/")]) is None
+    assert infer_page_url_template(LISTING, []) is None
+
+
+def test_page_url():
+    assert page_url(LISTING + "?page={page}", 7) == LISTING + "?page=7"
@@ -0,0 +1,299 @@
+import asyncio
+import time
+from email.utils import formatdate
+import httpx
+import pytest
+import rate_control
+from rate_control import (
+    ERROR, FATAL, OK, SLOW, THROTTLED, RateController, ServerError, TargetLimiter, Throttled,
+    backoff_delay, check_response, classify, parse_retry_after,
+)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class StatusError(Exception):
+    # Shaped like openai.APIStatusError: status_code plus a response with headers
+    def __init__(self, status, headers=None):
+        super().__init__(f"HTTP {status}")
+        self.status_code = status
+        self.response = httpx.Response(status, headers=headers)
+
+
+# parse_retry_after / check_response / classify
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("3", 3.0),
+    (" 2.5 ", 2.5),
+    ("-5", 0.0),
+    ("100000", rate_control.MAX_RETRY_AFTER),
+    ("soon", None),
+    (None, None),
+])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    assert 5 < parse_retry_after(formatdate(time.time() + 10, usegmt=True)) <= 10
+    assert parse_retry_after(formatdate(time.time() - 10, usegmt=True)) == 0.0
+
+
+def test_check_response_throttled():
+    with pytest.raises(Throttled) as raised:
+        check_response(429, {"Retry-After": "7"})
+    assert raised.value.retry_after == 7.0
+    with pytest.raises(Throttled) as raised:
+        check_response(503, {"retry-after": "1"})
+    assert raised.value.retry_after == 1.0
+    with pytest.raises(Throttled) as raised:
+        check_response(429)
+    assert raised.value.retry_after is None
+
+
+@pytest.mark.parametrize("status", [500, 502, 504])
+def test_check_response_server_error(status):
+    with pytest.raises(ServerError):
+        check_response(status)
+
+
+@pytest.mark.parametrize("status", [200, 301, 403, 404, 503])
+def test_check_response_leaves_other_statuses_alone(status):
+    # A 503 without Retry-After is usually a bot challenge, handled by the caller
+    check_response(status, {})
+
+
+@pytest.mark.parametrize("exc, expected", [
+    (Throttled("HTTP 429", 4.0), (THROTTLED, 4.0)),
+    (StatusError(429, {"Retry-After": "2"}), (THROTTLED, 2.0)),
+    (StatusError(503, {"Retry-After": "2"}), (THROTTLED, 2.0)),
+    (StatusError(503), (ERROR, None)),
+    (StatusError(500), (ERROR, None)),
+    (StatusError(408), (ERROR, None)),
+    (StatusError(400), (FATAL, None)),
+    (StatusError(404), (FATAL, None)),
+    (ServerError("HTTP 502"), (ERROR, None)),
+    (TimeoutError(), (ERROR, None)),
+    (httpx.ConnectError("refused"), (ERROR, None)),
+])
+def test_classify(exc, expected):
+    assert classify(exc) == expected
+
+
+def test_classify_reads_status_from_response():
+    request = httpx.Request("GET", "https://www.lusha.com/")
+    response = httpx.Response(429, headers={"Retry-After": "3"}, request=request)
+    exc = httpx.HTTPStatusError("Too Many Requests", request=request, response=response)
+    assert classify(exc) == (THROTTLED, 3.0)
+
+
+def test_backoff_delay_bounds():
+    for attempt in range(10):
+        assert 0 <= backoff_delay(attempt) <= min(rate_control.MAX_BACKOFF, rate_control.BACKOFF * 2 ** attempt)
+    assert 5.0 <= backoff_delay(0, retry_after=5.0) <= 5.0 + rate_control.BACKOFF
+
+
+# AIMD
+
+
+def test_success_increases_limit_additively_up_to_max():
+    limiter = TargetLimiter("t", concurrency=2, max_concurrency=4, rate=0)
+    limiter.in_flight = 1
+    limiter.release(OK)
+    assert limiter.limit == 2.5
+    for _ in range(50):
+        limiter.in_flight = 1
+        limiter.release(OK)
+    assert limiter.limit == 4
+    assert limiter.counts[OK] == 51
+
+
+@pytest.mark.parametrize("outcome, factor", [
+    (THROTTLED, rate_control.DECREASE_ON_THROTTLE),
+    (ERROR, rate_control.DECREASE_ON_ERROR),
+])
+def test_failure_decreases_limit_once_per_burst(outcome, factor):
+    limiter = TargetLimiter("t", concurrency=8, max_concurrency=8, rate=0)
+    limiter.in_flight = 2
+    limiter.release(outcome)
+    assert limiter.limit == 8 * factor
+    # A second failure from a call that was already in flight doesn't cut again
+    limiter.release(outcome)
+    assert limiter.limit == 8 * factor
+    assert limiter.counts[outcome] == 2
+
+
+def test_limit_never_drops_below_one():
+    limiter = TargetLimiter("t", concurrency=2, max_concurrency=2, rate=0)
+    for _ in range(5):
+        limiter.in_flight = 1
+        limiter._last_decrease = 0.0
+        limiter.release(THROTTLED)
+    assert limiter.limit == 1.0
+
+
+def test_throttling_pauses_the_target():
+    limiter = TargetLimiter("t", rate=0)
+    limiter.in_flight = 1
+    limiter.release(THROTTLED, retry_after=30)
+    assert 29 < limiter.paused_until - time.monotonic() <= 30
+    limiter.in_flight = 1
+    limiter._last_decrease = 0.0
+    limiter.release(THROTTLED)
+    assert limiter.paused_until - time.monotonic() > 29  # a shorter pause doesn't shorten it
+
+
+def test_latency_spike_counts_as_slow():
+    limiter = TargetLimiter("t", concurrency=4, max_concurrency=4, rate=0)
+    for _ in range(rate_control.MIN_SAMPLES):
+        limiter.in_flight = 1
+        limiter.release(OK, latency=0.1)
+    assert limiter.limit == 4
+    limiter.in_flight = 1
+    limiter.release(OK, latency=1.0)
+    assert limiter.counts[SLOW] == 1
+    assert limiter.limit == pytest.approx(4 * rate_control.DECREASE_ON_SLOW)
+
+
+def test_rate_adapts_within_bounds():
+    limiter = TargetLimiter("t", rate=4, max_rate=4.1)
+    limiter.in_flight = 1
+    limiter.release(OK)
+    assert limiter.rate == pytest.approx(4 + rate_control.RATE_STEP)
+    for _ in range(10):
+        limiter.in_flight = 1
+        limiter.release(OK)
+    assert limiter.rate == 4.1
+    for _ in range(10):
+        limiter.in_flight = 1
+        limiter._last_decrease = 0.0
+        limiter.release(THROTTLED)
+    assert limiter.rate == limiter.min_rate == 1.0
+
+
+def test_fatal_outcome_is_not_held_against_the_target():
+    limiter = TargetLimiter("t", concurrency=2, max_concurrency=4, rate=0)
+    limiter.in_flight = 1
+    limiter.release(FATAL)
+    assert limiter.limit == 2
+    assert limiter.paused_until == 0.0
+
+
+# Token bucket and concurrency
+
+
+def test_token_bucket_spaces_requests():
+    async def scenario():
+        limiter = TargetLimiter("t", concurrency=8, max_concurrency=8, rate=20, max_rate=20)
+        start = time.monotonic()
+        for _ in range(5):
+            await limiter.acquire()
+            limiter.cancel()
+        return time.monotonic() - start
+
+    # One token up front, then one every 50 ms
+    assert 0.18 <= run(scenario()) < 1.0
+
+
+def test_acquire_waits_out_a_pause():
+    async def scenario():
+        limiter = TargetLimiter("t", rate=0)
+        limiter.paused_until = time.monotonic() + 0.1
+        start = time.monotonic()
+        await limiter.acquire()
+        return time.monotonic() - start
+
+    assert run(scenario()) >= 0.09
+
+
+def test_acquire_blocks_at_the_concurrency_limit():
+    async def scenario():
+        limiter = TargetLimiter("t", concurrency=1, max_concurrency=1, rate=0)
+        await limiter.acquire()
+        second = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0.01)
+        assert not second.done()
+        limiter.release(OK)
+        await asyncio.wait_for(second, 1)
+        assert limiter.in_flight == 1
+
+    run(scenario())
+
+
+def test_cancelled_waiter_passes_its_wakeup_on():
+    async def scenario():
+        limiter = TargetLimiter("t", concurrency=1, max_concurrency=1, rate=0)
+        await limiter.acquire()
+        second = asyncio.ensure_future(limiter.acquire())
+        third = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        limiter.cancel()  # wakes `second`...
+        second.cancel()   # ...which is cancelled before it runs
+        await asyncio.wait_for(third, 1)
+        assert second.cancelled()
+        assert limiter.in_flight == 1
+        assert not limiter._waiters
+
+    run(scenario())
+
+
+# RateController.call
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    monkeypatch.setattr(rate_control, "BACKOFF", 0.0)
+    controller = RateController()
+    controller.configure("t", rate=0)
+    return controller
+
+
+def failing(*errors, result="ok"):
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    return fn, calls
+
+
+def test_call_retries_then_succeeds(controller):
+    fn, calls = failing(ServerError("HTTP 500"), Throttled("HTTP 429", 0.0))
+    assert run(controller.call("t", fn, retries=2)) == "ok"
+    assert len(calls) == 3
+    counts = controller.snapshot()["t"]
+    assert (counts[ERROR], counts[THROTTLED], counts[OK]) == (1, 1, 1)
+    assert counts["in_flight"] == 0
+
+
+def test_call_raises_once_retries_run_out(controller):
+    fn, calls = failing(*[ServerError("HTTP 500")] * 3)
+    with pytest.raises(ServerError):
+        run(controller.call("t", fn, retries=2))
+    assert len(calls) == 3
+
+
+def test_call_does_not_retry_fatal_errors(controller):
+    fn, calls = failing(StatusError(400))
+    with pytest.raises(StatusError):
+        run(controller.call("t", fn, retries=2))
+    assert len(calls) == 1
+
+
+def test_call_waits_on_the_pacer(controller):
+    waited = []
+
+    class Pacer:
+        async def wait(self, url):
+            waited.append(url)
+
+    controller.pacer = Pacer()
+    fn, _ = failing()
+    run(controller.call("t", fn, url="https://www.lusha.com/a"))
+    assert waited == ["https://www.lusha.com/a"]
@@ -0,0 +1,26 @@
+import metrics
+from readiness import _record, get_wait_stats
+
+
+def test_wait_stats_come_from_the_metrics_registry():
+    metrics.reset_metrics()
+    _record("listing", "selector", 10.0)
+    _record("listing", "timeout", 30.0)
+    _record("company", "networkidle", 5.0)
+    metrics.observe("navigate", 99.0, stage="listing")  # other spans are ignored
+
+    stats = get_wait_stats()
+    assert set(stats) == {"listing", "company"}
+    assert stats["listing"]["count"] == 2
+    assert stats["listing"]["mean_ms"] == 20.0
+    assert stats["listing"]["max_ms"] == 30.0
+    assert stats["listing"]["signals"] == {"selector": 1, "timeout": 1}
+    assert stats["company"]["signals"] == {"networkidle": 1}
+
+    metrics.reset_metrics()
+    assert get_wait_stats() == {}
+
+
+def test_parse_key_inverts_metric_key():
+    for name, tags in [("wait", {}), ("wait_signal", {"label": "listing", "signal": "timeout"})]:
+        assert metrics.parse_key(metrics.metric_key(name, tags)) == (name, tags)
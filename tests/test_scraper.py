@@ -0,0 +1,197 @@
+import asyncio
+import sqlite3
+import pytest
+import browser_pool
+import http_fetch
+import scraper
+from browser_pool import BrowserPool
+from cache import Cache, STALE
+
+BASE = "https://www.lusha.com"
+LISTING = BASE + "/company-search/software/germany/"
+PER_PAGE = 10
+
+
+# A fake browser behind the real pool, and a fake listing site behind the scraper's page helpers
+
+
+class FakePage:
+    def __init__(self):
+        self.url = "about:blank"
+
+    async def query_selector(self, selector):
+        return None
+
+    async def close(self):
+        pass
+
+
+class FakeContext:
+    async def new_page(self):
+        await asyncio.sleep(0)
+        return FakePage()
+
+    async def close(self):
+        pass
+
+
+class FakeBrowser:
+    def is_connected(self):
+        return True
+
+    async def new_context(self):
+        return FakeContext()
+
+    async def close(self):
+        pass
+
+
+class FakePlaywright:
+    async def start(self):
+        return self
+
+    async def stop(self):
+        pass
+
+
+def page_num(url):
+    return int(url.split("?page=")[1]) if "?page=" in url else 1
+
+
+def company_links(n, pages):
+    if n > pages:
+        return []
+    return [{"text": f"Company {n}-{i}", "href": f"/company-search/company/c{n}-{i}/", "visible": True}
+            for i in range(PER_PAGE)]
+
+
+@pytest.fixture
+def site(monkeypatch):
+    """
+    site(pages, http_page1=False) serves a listing of `pages` pages to the
+    scraper: everything goes through the browser, except page 1 over HTTP when
+    http_page1 is set (then without the pagination links, as if they were
+    rendered by script). Returns the pool and a log of browser navigations.
+    """
+    def install(pages, http_page1=False, pool_size=2):
+        pool = BrowserPool(size=pool_size, acquire_timeout=5)
+        navigations = []
+
+        async def fetch_links(url, selectors, stage, extra_selectors=(), container=None):
+            if http_page1 and url == LISTING:
+                return {"url": url, "links": company_links(1, pages), "extra": {"a": []}}
+            return None
+
+        async def goto(page, url, stage, timeout=60000):
+            await asyncio.sleep(0)
+            navigations.append(url)
+            page.url = url
+
+        async def wait_until_ready(page, selectors=(), label="page", **kwargs):
+            await asyncio.sleep(0)
+
+        async def extract_links(page, selectors):
+            await asyncio.sleep(0)
+            if "/company/" in page.url:
+                if selectors == ".company-hero-info a":
+                    return [{"text": "Website", "href": "https://www.example.com", "visible": True}]
+                return []
+            if selectors == "a":
+                return [{"text": "2", "href": LISTING + "?page=2", "visible": True}]
+            return company_links(page_num(page.url), pages)
+
+        monkeypatch.setattr(browser_pool, "async_playwright", FakePlaywright)
+        monkeypatch.setattr(browser_pool, "_launch_browser", lambda p: asyncio.sleep(0, FakeBrowser()))
+        monkeypatch.setattr(browser_pool, "install_routing", lambda context: asyncio.sleep(0))
+        monkeypatch.setattr(browser_pool, "track_page", lambda page, stage: None)
+        monkeypatch.setattr(browser_pool, "untrack_page", lambda page: None)
+        monkeypatch.setattr(scraper, "get_pool", lambda: pool)
+        monkeypatch.setattr(scraper, "get_cache", lambda: Cache(path=":memory:"))
+        monkeypatch.setattr(scraper, "fetch_links", fetch_links)
+        monkeypatch.setattr(scraper, "_goto", goto)
+        monkeypatch.setattr(scraper, "wait_until_ready", wait_until_ready)
+        monkeypatch.setattr(scraper, "extract_links", extract_links)
+        return pool, navigations
+
+    return install
+
+
+def scrape(max_results, concurrency):
+    async def collect():
+        events = []
+        async for kind, item in scraper._iter_companies(LISTING, max_results, concurrency=concurrency):
+            events.append((kind, item))
+        return events
+
+    return asyncio.run(asyncio.wait_for(collect(), 10))
+
+
+def test_browser_listing_and_enrichment_share_a_full_pool(site):
+    # As many enrichment workers as pages: listing pages 2..N still get a slot
+    pool, _ = site(pages=5, pool_size=2)
+    events = scrape(max_results=50, concurrency=2)
+    enriched = [company for kind, company in events if kind == "enriched"]
+    assert len(enriched) == 50
+    assert all(company["website_url"] == "https://www.example.com" for company in enriched)
+    assert ("listing_done", 50) in events
+    assert pool._slots.qsize() == 2
+
+
+def test_http_page_one_then_browser_pagination(site):
+    # Page 1 parses over HTTP but its page links are rendered by script: the
+    # browser must paginate from there, not re-read page 1 and stop
+    http_fetch.reset_fetch_stats()
+    _, navigations = site(pages=3, http_page1=True)
+    events = scrape(max_results=100, concurrency=2)
+    assert ("listing_done", 30) in events
+    assert len({company["url"] for kind, company in events if kind == "listed"}) == 30
+    assert navigations.count(LISTING) == 1
+    # Page 1 isn't counted as a browser fetch; pages 2-4 are (4 is the empty end)
+    assert http_fetch.get_fetch_stats()["listing"][http_fetch.BROWSER] == 3
+
+
+def test_stale_enrichment_is_served_and_revalidated(site, monkeypatch):
+    site(pages=1)
+    cache = Cache(path=":memory:", ttls={"enrichment": (-1, 3600)})  # every entry is stale
+    cache.set("enrichment", BASE + "/company-search/company/c1-0/", {"website_url": "https://old.example"})
+    monkeypatch.setattr(scraper, "get_cache", lambda: cache)
+
+    async def scenario():
+        events = [event async for event in scraper._iter_companies(LISTING, 10, concurrency=2)]
+        await asyncio.gather(*scraper._revalidate_tasks)
+        return events
+
+    events = asyncio.run(asyncio.wait_for(scenario(), 10))
+    first = next(company for kind, company in events if kind == "enriched" and company["url"].endswith("/c1-0/"))
+    assert first["website_url"] == "https://old.example"
+    assert cache.get("enrichment", first["url"]) == ({"website_url": "https://www.example.com"}, STALE)
+
+
+def test_cache_errors_dont_fail_the_scrape(site, monkeypatch):
+    site(pages=1)
+
+    def locked(*args):
+        raise sqlite3.OperationalError("database is locked")
+
+    cache = Cache(path=":memory:")
+    monkeypatch.setattr(cache, "_connect", locked)
+    monkeypatch.setattr(scraper, "get_cache", lambda: cache)
+    enriched = [company for kind, company in scrape(max_results=10, concurrency=2) if kind == "enriched"]
+    assert len(enriched) == 10
+    assert cache.misses == 11  # the listing and every company
+
+
+def test_pool_acquire_times_out(site):
+    pool, _ = site(pages=1, pool_size=1)
+    pool.acquire_timeout = 0.05
+
+    async def hold_and_borrow():
+        async with pool.page():
+            with pytest.raises(TimeoutError):
+                async with pool.page():
+                    pass
+        async with pool.page():
+            pass
+
+    asyncio.run(hold_and_borrow())
+    assert pool._slots.qsize() == 1
@@ -1,14 +1,13 @@
 import io
-import pandas as pd
+from export import write_excel
 
 # PDF extraction removed as per user request
 # def extract_text_from_pdf(uploaded_file): ...
 
 def to_excel(df):
     """
-    Converts a pandas DataFrame to an Excel binary.
+    Converts a pandas DataFrame to an Excel binary (streamed in write-only mode).
     """
     output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Sheet1')
+    write_excel(df.to_dict("records"), output, columns=list(df.columns), sheet_name='Sheet1')
     return output.getvalue()